@@ -0,0 +1,185 @@
+"""
+Active-Learning Surrogate for Content Scoring
+=============================================
+Cuts LLM calls by training cheap per-category classifiers on LLM labels and
+only sending the filings the classifiers are unsure about:
+
+  1. Label a random INITIAL_SAMPLE of filings with the LLM; set aside
+     HOLDOUT_FRACTION of them as a fixed evaluation set
+  2. Train one logistic regression per category on TF-IDF features
+  3. Send the ROUND_SIZE least-confident unlabelled filings to the LLM,
+     retrain, and repeat for up to MAX_ROUNDS (or until every remaining
+     filing clears CONFIDENCE_THRESHOLD)
+  4. Report per-category agreement with the LLM on the holdout, persist the
+     vectorizer + models, and score the rest locally
+
+Output matches content_scores (plus label_source = "llm" | "surrogate").
+"""
+
+import joblib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from sklearn.dummy import DummyClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from content_scoring import (
+    load_filings_from_dir, score_filing, _build_result, _save,
+    SPECIFICITY_CATEGORIES, ALL_CATEGORIES, MAX_IN_FLIGHT, DATA_DIR,
+)
+
+OUTPUT_PATH = "content_scores_surrogate"
+MODEL_PATH  = "surrogate_models.joblib"
+
+INITIAL_SAMPLE       = 40
+HOLDOUT_FRACTION     = 0.25
+ROUND_SIZE           = 20
+MAX_ROUNDS           = 3
+CONFIDENCE_THRESHOLD = 0.8    # min over categories of max(p, 1 - p)
+SEED                 = 42
+
+
+# =============================================================================
+# MODEL
+# =============================================================================
+
+def fit_vectorizer(texts):
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), min_df=2, max_df=0.95,
+                                 max_features=50_000, sublinear_tf=True)
+    return vectorizer, vectorizer.fit_transform(texts)
+
+
+def train_models(X, labels):
+    """
+    One classifier per category. labels is a DataFrame aligned with X's rows;
+    rows with a missing label for a category are ignored for that category,
+    and single-class categories fall back to a prior-only model.
+    """
+    models = {}
+    for cat in SPECIFICITY_CATEGORIES:
+        y    = labels[cat].to_numpy(dtype=float)
+        mask = ~np.isnan(y)
+        y    = y[mask].astype(int)
+        if len(np.unique(y)) < 2:
+            model = DummyClassifier(strategy="prior")
+            model.fit(np.zeros((max(len(y), 1), 1)), y if len(y) else [0])
+        else:
+            model = LogisticRegression(C=4.0, class_weight="balanced", max_iter=1_000)
+            model.fit(X[mask], y)
+        models[cat] = model
+    return models
+
+
+def predict_proba(models, X):
+    """N x 6 DataFrame of P(category score = 1)."""
+    probs = {}
+    for cat, model in models.items():
+        p = model.predict_proba(X if not isinstance(model, DummyClassifier) else np.zeros((X.shape[0], 1)))
+        probs[cat] = p[:, list(model.classes_).index(1)] if 1 in model.classes_ else np.zeros(X.shape[0])
+    return pd.DataFrame(probs)
+
+
+def confidence(probs):
+    """Per-filing confidence: the least certain category decides."""
+    p = probs.to_numpy()
+    return np.maximum(p, 1 - p).min(axis=1) if len(p) else np.zeros(0)
+
+
+def save_models(vectorizer, models, path=MODEL_PATH):
+    joblib.dump({"vectorizer": vectorizer, "models": models}, path)
+    print(f"[INFO] Saved {path}")
+
+
+def score_locally(texts, path=MODEL_PATH):
+    """Scores new filings with persisted surrogate models; returns P(score = 1) per category."""
+    bundle = joblib.load(path)
+    return predict_proba(bundle["models"], bundle["vectorizer"].transform(texts))
+
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+
+def _label(filings, indices, max_in_flight):
+    """LLM labels for filings[indices] (score_filing goes through the cache and rate limiter)."""
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        scores = list(executor.map(lambda i: score_filing(filings[i]["text"]), indices))
+    return {i: _build_result(filings[i]["ticker"], filings[i]["year"], s) for i, s in zip(indices, scores)}
+
+
+def agreement(models, X, labels):
+    """Share of holdout filings where the surrogate's label matches the LLM, per category."""
+    pred = predict_proba(models, X) >= 0.5
+    out  = {}
+    for cat in SPECIFICITY_CATEGORIES:
+        y    = labels[cat].to_numpy(dtype=float)
+        mask = ~np.isnan(y)
+        out[cat] = float((pred[cat].to_numpy()[mask] == (y[mask] == 1)).mean()) if mask.any() else np.nan
+    return pd.Series(out)
+
+
+def run_active_learning(data_dir=DATA_DIR, output_path=OUTPUT_PATH, model_path=MODEL_PATH,
+                        initial_sample=INITIAL_SAMPLE, round_size=ROUND_SIZE, max_rounds=MAX_ROUNDS,
+                        threshold=CONFIDENCE_THRESHOLD, max_in_flight=MAX_IN_FLIGHT, seed=SEED):
+    filings = load_filings_from_dir(data_dir)
+    if not filings:
+        print(f"[ERROR] No txt files found in {data_dir}/")
+        return
+
+    rng             = np.random.default_rng(seed)
+    vectorizer, X   = fit_vectorizer([f["text"] for f in filings])
+    order           = rng.permutation(len(filings))
+    initial         = order[:min(initial_sample, len(filings))]
+    n_holdout       = int(len(initial) * HOLDOUT_FRACTION)
+    holdout, train  = initial[:n_holdout].tolist(), initial[n_holdout:].tolist()
+
+    print(f"\n[1/3] Labelling initial sample: {len(train)} train + {len(holdout)} holdout")
+    labelled = _label(filings, initial.tolist(), max_in_flight)
+
+    def frame(indices):
+        return pd.DataFrame([labelled[i] for i in indices], columns=["ticker", "year"] + ALL_CATEGORIES)
+
+    models = train_models(X[train], frame(train))
+    for rnd in range(1, max_rounds + 1):
+        unlabelled = np.setdiff1d(np.arange(len(filings)), list(labelled))
+        if len(unlabelled) == 0:
+            break
+        conf   = confidence(predict_proba(models, X[unlabelled]))
+        ranked = np.argsort(conf, kind="stable")[:round_size]
+        unsure = [int(unlabelled[k]) for k in ranked if conf[k] < threshold]
+        if not unsure:
+            print(f"[INFO] Round {rnd}: all remaining filings above confidence {threshold}")
+            break
+
+        print(f"\n[2/3] Round {rnd}: sending {len(unsure)} low-confidence filings to the LLM")
+        labelled.update(_label(filings, unsure, max_in_flight))
+        train += unsure
+        models = train_models(X[train], frame(train))
+
+    print("\n[3/3] Holdout agreement with LLM labels:")
+    print(agreement(models, X[holdout], frame(holdout)).round(3).to_string() if holdout else "  (no holdout)")
+    save_models(vectorizer, models, model_path)
+
+    # LLM labels where we have them, surrogate predictions everywhere else
+    rest    = np.setdiff1d(np.arange(len(filings)), list(labelled))
+    probs   = predict_proba(models, X[rest]) if len(rest) else pd.DataFrame(columns=SPECIFICITY_CATEGORIES)
+    results = [dict(r, label_source="llm") for r in labelled.values()]
+    for row, i in enumerate(rest):
+        result = {"ticker": filings[i]["ticker"], "year": filings[i]["year"], "label_source": "surrogate"}
+        for cat in SPECIFICITY_CATEGORIES:
+            p = float(probs[cat].iloc[row])
+            result[cat]                = int(p >= 0.5)
+            result[f"{cat}_rationale"] = f"surrogate P(1) = {p:.2f}"
+        result["llm_boilerplate"]           = None
+        result["llm_boilerplate_rationale"] = None
+        results.append(result)
+
+    _save(pd.DataFrame(), results, output_path)
+    print(f"\n[INFO] {len(labelled)} LLM calls, {len(rest)} filings scored by surrogate "
+          f"({len(rest) / len(filings):.0%} of calls saved)")
+    return pd.read_parquet(f"{output_path}.parquet")
+
+
+if __name__ == "__main__":
+    run_active_learning()
@@ -1,6 +1,8 @@
 import pandas as pd
 import nltk
 
+from token_cache import load_token_cache, filing_tokens, encode, count_phrase
+
 nltk.download("punkt", quiet=True)
 
 PARQUET_PATH = "length_results.parquet"
@@ -72,13 +74,40 @@ def compute_boilerplate(text, word_count, phrases=BOILERPLATE_PHRASES):
     return B, round(ratio, 6), matched
 
 
-def run_boilerplate_detection(parquet_path=PARQUET_PATH, output_path=OUTPUT_PATH):
+def compute_boilerplate_tokens(tokens, encoded_phrases, word_count):
+    """
+    Token-cache variant of compute_boilerplate: phrase matching over int32 ids.
+    Matches ignore punctuation between words, so counts can run slightly
+    above the substring version.
+    """
+    if len(tokens) == 0 or word_count == 0:
+        return 0, 0.0, []
+    matched = [p for p, ids in encoded_phrases.items() if count_phrase(tokens, ids) > 0]
+    B       = len(matched)
+    ratio   = B / word_count
+    return B, round(ratio, 6), matched
+
+
+def run_boilerplate_detection(parquet_path=PARQUET_PATH, output_path=OUTPUT_PATH, token_cache_dir=None):
     df = pd.read_parquet(parquet_path)
 
-    results = df.apply(
-        lambda row: compute_boilerplate(row["combined_text"], row["len_combined"]),
-        axis=1
-    )
+    if token_cache_dir:
+        cache   = load_token_cache(token_cache_dir)
+        encoded = {p: encode(cache, p, partial_edges=True) for p in BOILERPLATE_PHRASES}
+        index   = {key: i for i, key in enumerate(zip(cache["keys"]["ticker"], cache["keys"]["year"]))}
+        results = df.apply(
+            lambda row: compute_boilerplate_tokens(
+                filing_tokens(cache, index[(row["ticker"], row["year"])]),
+                encoded, row["len_combined"],
+            ) if (row["ticker"], row["year"]) in index
+            else compute_boilerplate(row["combined_text"], row["len_combined"]),
+            axis=1
+        )
+    else:
+        results = df.apply(
+            lambda row: compute_boilerplate(row["combined_text"], row["len_combined"]),
+            axis=1
+        )
 
     df["boilerplate_count"] = results.apply(lambda x: x[0])
     df["boilerplate_ratio"] = results.apply(lambda x: x[1])
@@ -0,0 +1,180 @@
+"""
+SEC XBRL Companyfacts Ingestion
+===============================
+Builds a per-issuer, per-fiscal-year lookup of public float, shares
+outstanding and SIC code from the SEC bulk archives, read directly from the
+local zips (never extracted):
+
+  companyfacts.zip – https://www.sec.gov/Archives/edgar/daily-index/xbrl/companyfacts.zip
+  submissions.zip  – https://www.sec.gov/Archives/edgar/daily-index/bulkdata/submissions.zip
+                     (optional; companyfacts has no tickers or SIC codes)
+
+Members are streamed one company at a time and parsed with orjson, so memory
+is bounded by the largest single company file, not the archive (tens of GB
+uncompressed). Rows are flushed to parquet in batches.
+
+Output columns: cik, ticker, entity_name, fiscal_year, public_float,
+shares_outstanding, sic
+"""
+
+import os
+import zipfile
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+COMPANYFACTS_ZIP = "companyfacts.zip"
+SUBMISSIONS_ZIP  = "submissions.zip"
+OUTPUT_PATH      = "companyfacts"
+FLUSH_ROWS       = 50_000
+
+ANNUAL_FORMS = {"10-K", "10-K/A", "10-K405", "10-KT", "20-F", "40-F"}
+
+# (taxonomy, concept, unit) -> output column, in order of preference
+FACTS = {
+    "public_float": [
+        ("dei", "EntityPublicFloat", "USD"),
+    ],
+    "shares_outstanding": [
+        ("dei",     "EntityCommonStockSharesOutstanding", "shares"),
+        ("us-gaap", "CommonStockSharesOutstanding",       "shares"),
+    ],
+}
+
+# Cover-page share counts are one fact per share class; the filing's total is their sum
+SUMMED_CONCEPTS = {("dei", "EntityCommonStockSharesOutstanding")}
+
+SCHEMA = pa.schema([
+    ("cik",                pa.int64()),
+    ("ticker",             pa.string()),
+    ("entity_name",        pa.string()),
+    ("fiscal_year",        pa.int16()),
+    ("public_float",       pa.float64()),
+    ("shares_outstanding", pa.float64()),
+    ("sic",                pa.int16()),
+])
+
+
+def _iter_members(zip_path):
+    """Yields (member_name, parsed_json) one archive member at a time."""
+    with zipfile.ZipFile(zip_path) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or not info.filename.endswith(".json"):
+                continue
+            with zf.open(info) as f:
+                try:
+                    yield info.filename, orjson.loads(f.read())
+                except orjson.JSONDecodeError:
+                    print(f"[WARN] Skipping unparseable member: {info.filename}")
+
+
+def load_submissions(zip_path=SUBMISSIONS_ZIP):
+    """cik -> (tickers, sic) from the submissions bulk archive."""
+    lookup = {}
+    for name, doc in _iter_members(zip_path):
+        # CIK##########-submissions-NNN.json pages only hold older filings
+        if "-submissions-" in name or "cik" not in doc:
+            continue
+        sic = doc.get("sic")
+        lookup[int(doc["cik"])] = (
+            [t.upper() for t in doc.get("tickers") or []],
+            int(sic) if sic and str(sic).isdigit() else None,
+        )
+    print(f"[INFO] Loaded submissions for {len(lookup):,} entities")
+    return lookup
+
+
+def annual_values(facts, candidates):
+    """
+    fiscal_year -> value for the first concept in candidates that is
+    reported. Per fiscal year the latest-filed annual report wins, and
+    within it the latest period end (a 10-K also repeats the prior-year
+    balance). Concepts in SUMMED_CONCEPTS are reported once per share class,
+    so the classes of that (accession, end) are added up.
+    """
+    for taxonomy, concept, unit in candidates:
+        entries = facts.get(taxonomy, {}).get(concept, {}).get("units", {}).get(unit)
+        if not entries:
+            continue
+        summed = (taxonomy, concept) in SUMMED_CONCEPTS
+        best   = {}
+        for e in entries:
+            fy, val = e.get("fy"), e.get("val")
+            if fy is None or val is None or e.get("form") not in ANNUAL_FORMS:
+                continue
+            key = (e.get("filed", ""), e.get("accn", ""), e.get("end", ""))
+            if fy not in best or key > best[fy][0]:
+                best[fy] = (key, val)
+            elif key == best[fy][0] and summed:
+                best[fy] = (key, best[fy][1] + val)
+        if best:
+            return {fy: val for fy, (_, val) in best.items()}
+    return {}
+
+
+def company_rows(doc, submissions=None, tickers=None):
+    """Flattens one companyfacts document into per-fiscal-year rows."""
+    cik          = int(doc.get("cik") or 0)
+    ticker_list, sic = (submissions or {}).get(cik, ([], None))
+    if tickers is not None:
+        ticker_list = [t for t in ticker_list if t in tickers]
+        if not ticker_list:
+            return []
+
+    facts  = doc.get("facts") or {}
+    values = {col: annual_values(facts, candidates) for col, candidates in FACTS.items()}
+    years  = sorted(set().union(*values.values()))
+
+    return [
+        {
+            "cik":                cik,
+            "ticker":             ticker,
+            "entity_name":        doc.get("entityName"),
+            "fiscal_year":        fy,
+            "public_float":       values["public_float"].get(fy),
+            "shares_outstanding": values["shares_outstanding"].get(fy),
+            "sic":                sic,
+        }
+        for fy in years
+        for ticker in (ticker_list or [None])
+    ]
+
+
+def build_companyfacts_lookup(companyfacts_zip=COMPANYFACTS_ZIP, submissions_zip=SUBMISSIONS_ZIP,
+                              output_path=OUTPUT_PATH, tickers=None):
+    """
+    Streams companyfacts_zip and writes {output_path}.parquet. tickers
+    (optional iterable) restricts the output to those issuers; it needs the
+    submissions archive for the CIK -> ticker mapping.
+    """
+    submissions = load_submissions(submissions_zip) if submissions_zip and os.path.exists(submissions_zip) else None
+    if submissions is None:
+        print("[WARN] No submissions archive — ticker and sic will be empty")
+    if tickers is not None:
+        tickers = {t.upper() for t in tickers}
+
+    companies, n_rows, buffer = 0, 0, []
+    tmp = f"{output_path}.parquet.tmp"
+    with pq.ParquetWriter(tmp, SCHEMA, compression="zstd") as writer:
+        for _, doc in _iter_members(companyfacts_zip):
+            rows = company_rows(doc, submissions, tickers)
+            if not rows:
+                continue
+            companies += 1
+            buffer.extend(rows)
+            if len(buffer) >= FLUSH_ROWS:
+                writer.write_table(pa.Table.from_pylist(buffer, schema=SCHEMA))
+                n_rows += len(buffer)
+                buffer  = []
+                print(f"  [INFO] {companies:,} companies, {n_rows:,} rows written")
+        if buffer:
+            writer.write_table(pa.Table.from_pylist(buffer, schema=SCHEMA))
+            n_rows += len(buffer)
+    os.replace(tmp, f"{output_path}.parquet")
+
+    print(f"[INFO] Saved {output_path}.parquet ({companies:,} companies, {n_rows:,} rows)")
+    return f"{output_path}.parquet"
+
+
+if __name__ == "__main__":
+    build_companyfacts_lookup()
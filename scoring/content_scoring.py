@@ -1,21 +1,54 @@
 import os
 import time
 import json
+import threading
 import pandas as pd
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
-from google import genai
+
+import llm_cache
+from passage_selection import select_passages
+from token_cache import SECTION_MARKER
+from llm_backends import get_backend, RateLimitError
+from response_validation import validate_scores
+from llm_metrics import call_metrics
 
 # ── Load Environment Variables ────────────────────────────────────────────────
 load_dotenv()
-API_KEY = os.environ.get("GEMINI_API_KEY")
 
 # ── Config ────────────────────────────────────────────────────────────────────
 DATA_DIR            = "data"       # folder containing ticker_year.txt files
 OUTPUT_PATH         = "content_scores"
 MODEL_NAME          = "gemini-2.5-flash-"
-SLEEP_BETWEEN_CALLS = 60 / 15     # 4 seconds — 15 RPM free tier
 
-client = genai.Client(api_key=API_KEY)
+# Quota — defaults are the free tier; set to what the project actually pays for
+RPM_LIMIT           = int(os.environ.get("GEMINI_RPM", 15))
+TPM_LIMIT           = int(os.environ.get("GEMINI_TPM", 250_000))
+MAX_IN_FLIGHT       = int(os.environ.get("GEMINI_MAX_IN_FLIGHT", 4))
+CHARS_PER_TOKEN     = 4        # rough local token estimate for TPM accounting
+MAX_OUTPUT_TOKENS   = 1_000    # reserved per call for the JSON response
+MAX_TEXT_CHARS      = 60_000     # hard cap on filing text per prompt (see SCORING_CHUNKED)
+# BM25 prefilter: send only the passages most relevant to the six categories
+# (Item 1C always kept) up to this many tokens; 0 falls back to plain truncation
+PROMPT_TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", 5_000))
+# SCORING_CHUNKED=1 scores filings longer than MAX_TEXT_CHARS as overlapping
+# windows (all text is seen) and reduces the per-window answers
+CHUNKED             = os.environ.get("SCORING_CHUNKED", "") == "1"
+CHUNK_CHARS         = 40_000
+CHUNK_OVERLAP       = 2_000      # so a sentence on a boundary is seen whole at least once
+CHUNK_WORKERS       = 4          # per filing; the shared limiter still paces every call
+LOAD_PREFETCH       = int(os.environ.get("LOAD_PREFETCH", 2))   # files read ahead by background threads
+CHECKPOINT_EVERY    = 10         # progress report interval; every result is journaled as it lands
+LLM_CACHE_DIR       = os.environ.get("LLM_CACHE_DIR", llm_cache.CACHE_DIR)
+MAX_RETRIES         = 4        # on 429 only; other failures are recorded as None
+REPAIR_RETRIES      = 2        # follow-up prompts for categories missing/invalid in the answer
+BACKOFF_SECONDS     = 2.0      # doubled after every 429
+
+# LLM_BACKEND=gemini|mock|http — see llm_backends.py
+backend = get_backend(model=MODEL_NAME)
+# SCORING_FALLBACK=rules scores failed LLM calls with rule_based_scoring.py
+FALLBACK = os.environ.get("SCORING_FALLBACK", "").lower()
 
 SPECIFICITY_CATEGORIES = [
     "frameworks",
@@ -55,130 +88,480 @@ Respond ONLY with a valid JSON object in exactly this format, with no additional
 FILING TEXT:
 """
 
+# Per-category definitions for the follow-up prompt (same wording as PROMPT)
+CATEGORY_DEFINITIONS = {
+    "frameworks":        "Mention of specific industry-standard cybersecurity frameworks used by the firm (e.g., NIST CSF, ISO/IEC 27001, TISAX, SOC 2, PCI DSS).",
+    "specific_controls": "Identification of specific technical security tools, defensive layers, or rigorous processes (e.g., Multi-Factor Authentication (MFA), EDR, SIEM, Zero Trust Architecture, regular penetration testing, or encryption protocols).",
+    "named_individuals": "Identification of specific roles with named expertise, specific individuals, or specialized oversight bodies (e.g., naming the CISO, a Board member with cyber credentials, or a dedicated \"Cybersecurity Governance Council\").",
+    "quantitative_data": "Disclosure of specific cyber-related numbers or metrics (e.g., daily threat signal counts, number of threat actors tracked, dollar amounts for cyber litigation/insurance, or training completion percentages).",
+    "product_names":     "Mention of specific internal or third-party security product brands or proprietary technology platforms (e.g., Microsoft Copilot for Security, Palo Alto Prisma, Cortex XSIAM, or specialized tools like the \"Modular Control Centre System\").",
+    "technical_details": "Granular descriptions of specific cyber vulnerabilities, incident remediation, or architectural setups (e.g., detailing a \"command injection\" vulnerability, a \"nation-state password spray attack,\" or describing specific \"IT/OT segmentation\" protocols).",
+    "llm_boilerplate":   "Count the number of phrases in the disclosure that are generic and boilerplate — language that could apply to any company regardless of its actual security posture, for section 1A and, if it exists, 1C. Score 0 if the disclosure contains sufficient specific, operational content.",
+}
 
-# ── Score a single filing ─────────────────────────────────────────────────────
-def score_filing(text):
-    if not text or len(text.strip()) < 100:
-        return None
+FOLLOWUP_PROMPT = """You are a senior Cybersecurity Disclosure Analyst. Score ONLY the categories below for the filing text that follows. For the binary categories assign 1 only if the disclosure is Firm-Specific and Active — not negated, conditional/hypothetical, or generic.
 
-    full_prompt = PROMPT + text[:60000]
+{definitions}
 
-    try:
-        response = client.models.generate_content(model=MODEL_NAME, contents=full_prompt)
-        raw      = response.text.strip()
+Respond ONLY with a valid JSON object in exactly this format, with no additional text before or after:
+{schema}
+
+FILING TEXT:
+"""
 
-        if raw.startswith("```"):
-            raw = raw.split("```")[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-        raw = raw.strip()
 
-        return json.loads(raw)
+def followup_prompt(categories):
+    """Short prompt asking again for just the categories that failed validation."""
+    definitions = "\n".join(f"{cat}: {CATEGORY_DEFINITIONS[cat]}" for cat in categories)
+    schema      = ",\n".join(f'  "{cat}": {{"score": 0, "rationale": "exact quote or specific evidence from text"}}'
+                             for cat in categories)
+    return FOLLOWUP_PROMPT.format(definitions=definitions, schema="{\n" + schema + "\n}")
+
+
+# ── Rate limiting ─────────────────────────────────────────────────────────────
+class TokenBucket:
+    """
+    Thread-safe token bucket: holds up to `capacity` tokens, refilled
+    continuously at capacity / period seconds. acquire(n) blocks until n
+    tokens are available (n is clamped to capacity so it can't deadlock).
+    """
+
+    def __init__(self, capacity, period=60.0):
+        self.capacity = float(capacity)
+        self.rate     = self.capacity / period
+        self.tokens   = self.capacity
+        self.updated  = time.monotonic()
+        self.lock     = threading.Lock()
+
+    def _refill(self):
+        now          = time.monotonic()
+        self.tokens  = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, n=1):
+        n = min(float(n), self.capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                wait_s = (n - self.tokens) / self.rate
+            time.sleep(wait_s)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets; a call must pass both."""
+
+    def __init__(self, rpm=RPM_LIMIT, tpm=TPM_LIMIT):
+        self.requests = TokenBucket(rpm)
+        self.tokens   = TokenBucket(tpm)
+
+    def acquire(self, n_tokens):
+        self.requests.acquire(1)
+        self.tokens.acquire(n_tokens)
+
+
+rate_limiter = RateLimiter()
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+# ── Score a single filing ─────────────────────────────────────────────────────
+def _generate(llm, prompt, limiter, kind="score", prefix=""):
+    """
+    One rate-limited call for prefix + prompt, retried with exponential
+    backoff on 429s. The backend may serve a static prefix from its prefix
+    cache. The outcome is recorded in call_metrics (tokens, limiter wait,
+    latency, retries).
+    """
+    n_tokens = estimate_tokens(prefix + prompt)
+    wait_s   = 0.0
+    for attempt in range(MAX_RETRIES + 1):
+        t0 = time.monotonic()
+        limiter.acquire(n_tokens + MAX_OUTPUT_TOKENS)
+        t1      = time.monotonic()
+        wait_s += t1 - t0
+        try:
+            response = llm.generate(prompt, prefix)
+        except RateLimitError:
+            if attempt == MAX_RETRIES:
+                call_metrics.record(llm.cache_id, kind, n_tokens, 0, True, wait_s,
+                                    time.monotonic() - t1, attempt, "rate_limited")
+                raise
+            delay = BACKOFF_SECONDS * 2 ** attempt
+            print(f"  [WARN] Rate limited — retrying in {delay:.0f}s")
+            time.sleep(delay)
+            wait_s += delay
+            continue
+        except Exception:
+            call_metrics.record(llm.cache_id, kind, n_tokens, 0, True, wait_s,
+                                time.monotonic() - t1, attempt, "error")
+            raise
+
+        estimated = response.prompt_tokens is None or response.response_tokens is None
+        call_metrics.record(
+            llm.cache_id, kind,
+            response.prompt_tokens if response.prompt_tokens is not None else n_tokens,
+            response.response_tokens if response.response_tokens is not None else estimate_tokens(response.text),
+            estimated, wait_s, time.monotonic() - t1, attempt, cached_tokens=response.cached_tokens,
+        )
+        return response
+
+
+def prepare_text(text, token_budget=None):
+    """The filing text actually sent: BM25-selected passages, capped at MAX_TEXT_CHARS."""
+    token_budget = PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+    if token_budget > 0:
+        text = select_passages(text, token_budget)
+    return text[:MAX_TEXT_CHARS]
+
+
+def _score_text(sent, limiter, use_cache, llm):
+    """One prompt for exactly `sent`, answered from the response cache when possible."""
+    key = llm_cache.cache_key(llm.cache_id, PROMPT, sent)
+    if use_cache:
+        cached = llm_cache.get(key, LLM_CACHE_DIR)
+        if cached is not None:
+            call_metrics.record(llm.cache_id, "cache", estimate_tokens(PROMPT + sent),
+                                estimate_tokens(cached.get("raw") or ""), True, status="hit")
+            return cached["parsed"]
+
+    limiter = limiter or rate_limiter
+
+    try:
+        # PROMPT is identical for every filing: sent as a cacheable prefix
+        response      = _generate(llm, sent, limiter, prefix=PROMPT)
+        valid, failed = validate_scores(response.text, ALL_CATEGORIES)
+
+        # Re-ask only for what is missing or invalid instead of re-scoring everything
+        for _ in range(REPAIR_RETRIES):
+            if not failed:
+                break
+            print(f"  [WARN] Invalid response for {', '.join(failed)} — asking again for those only")
+            retry         = _generate(llm, followup_prompt(failed) + sent, limiter, kind="followup")
+            fixed, failed = validate_scores(retry.text, failed)
+            valid.update(fixed)
+
+        if failed:
+            print(f"  [WARN] Still invalid after {REPAIR_RETRIES} follow-ups: {', '.join(failed)}")
+            return None
+
+        parsed = {cat: valid[cat] for cat in ALL_CATEGORIES}
+        llm_cache.put(key, response.text, parsed, llm.cache_id, PROMPT, sent, LLM_CACHE_DIR)
+        return parsed
 
-    except json.JSONDecodeError as e:
-        print(f"  [WARN] JSON parse error: {e}")
-        return None
     except Exception as e:
         print(f"  [WARN] API error: {e}")
         return None
 
 
-# ── Save helper ───────────────────────────────────────────────────────────────
+def split_chunks(text, chunk_chars=CHUNK_CHARS, overlap=CHUNK_OVERLAP):
+    """
+    Overlapping windows of at most chunk_chars, cut at a paragraph break where
+    one falls in the second half of the window. Windows that start inside
+    Item 1C are prefixed with the section marker so the model keeps the
+    1A / 1C distinction for llm_boilerplate.
+    """
+    marker_at = text.find(SECTION_MARKER)
+    chunks, start = [], 0
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            brk = text.rfind("\n\n", start + chunk_chars // 2, end)
+            if brk != -1:
+                end = brk
+        chunk = text[start:end]
+        if 0 <= marker_at < start:
+            chunk = f"{SECTION_MARKER}\n\n{chunk}"
+        chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+        # Don't start mid-word
+        while start < end and not text[start - 1].isspace():
+            start += 1
+    return chunks
+
+
+def reduce_chunk_scores(chunk_scores):
+    """
+    A category scores 1 if any window confirms it; rationales of the
+    confirming windows are merged. llm_boilerplate phrase counts are summed.
+    """
+    reduced = {}
+    for cat in ALL_CATEGORIES:
+        entries = [c[cat] for c in chunk_scores if isinstance(c.get(cat), dict)]
+        scores  = [e["score"] for e in entries if e.get("score") is not None]
+        if cat == "llm_boilerplate":
+            score    = sum(scores) if scores else None
+            evidence = [e.get("rationale") for e in entries if e.get("score")]
+        else:
+            score    = max(scores) if scores else None
+            evidence = [e.get("rationale") for e in entries if e.get("score") == score]
+        evidence = list(dict.fromkeys(r for r in evidence if r))
+        reduced[cat] = {"score": score, "rationale": " | ".join(evidence)}
+    return reduced
+
+
+def score_filing_chunked(text, limiter=None, use_cache=True, llm=None):
+    """
+    Map-reduce scoring over the whole filing. Each window is its own cache
+    entry, so a re-run only re-sends windows whose text changed (or failed).
+    If any window fails the filing fails, rather than silently scoring a part.
+    """
+    chunks = split_chunks(text)
+    with ThreadPoolExecutor(max_workers=min(CHUNK_WORKERS, len(chunks))) as executor:
+        chunk_scores = list(executor.map(lambda c: _score_text(c, limiter, use_cache, llm), chunks))
+
+    failed = sum(c is None for c in chunk_scores)
+    if failed:
+        print(f"  [WARN] {failed}/{len(chunks)} chunks failed")
+        return None
+    return reduce_chunk_scores(chunk_scores)
+
+
+def score_filing(text, limiter=None, use_cache=True, llm=None, chunked=None):
+    if not text or len(text.strip()) < 100:
+        return None
+
+    llm     = llm or backend
+    chunked = CHUNKED if chunked is None else chunked
+    if chunked and len(text) > MAX_TEXT_CHARS:
+        return score_filing_chunked(text, limiter, use_cache, llm)
+    return _score_text(prepare_text(text), limiter, use_cache, llm)
+
+
+def score_with_fallback(text, limiter=None, use_cache=True, llm=None, fallback=None, chunked=None):
+    """score_filing, falling back to the local rule-based scorer when the LLM call fails."""
+    scores   = score_filing(text, limiter, use_cache, llm, chunked)
+    fallback = FALLBACK if fallback is None else fallback
+    if scores is None and fallback == "rules":
+        # Imported here: boilerplate_detector downloads NLTK data at import time
+        from rule_based_scoring import score_filing_rules
+        scores = score_filing_rules(text)
+        if scores is not None:
+            print("  [INFO] LLM failed — used rule-based scores")
+            for entry in scores.values():
+                entry["rationale"] = f"[rule-based] {entry['rationale']}"
+    return scores
+
+
+# ── Save helpers ──────────────────────────────────────────────────────────────
 def _save(existing, new_results, output_path):
+    """Writes existing + new_results to {output_path}.parquet atomically (temp file, then rename)."""
     new_df   = pd.DataFrame(new_results)
     combined = pd.concat([existing, new_df], ignore_index=True) if not existing.empty else new_df
+    combined = combined.drop_duplicates(["ticker", "year"], keep="last")
     combined["specificity_score"] = combined[SPECIFICITY_CATEGORIES].sum(axis=1) / TOTAL_MARKERS
-    combined.to_parquet(f"{output_path}.parquet", index=False)
+    combined = combined.sort_values(["ticker", "year"], kind="stable")
+    tmp_path = f"{output_path}.parquet.tmp"
+    combined.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, f"{output_path}.parquet")
 
 
-# ── Load filings from data/ directory ────────────────────────────────────────
-def load_filings_from_dir(data_dir):
-    """
-    Reads all ticker_year.txt files from data_dir.
-    Returns a list of dicts with ticker, year, and text.
-    """
-    filings = []
-    for filename in sorted(os.listdir(data_dir)):
-        if not filename.endswith(".txt"):
-            continue
-        name = filename[:-4]  # strip .txt
-        parts = name.rsplit("_", 1)
-        if len(parts) != 2:
-            print(f"[WARN] Skipping unrecognised filename: {filename}")
-            continue
-        ticker, year_str = parts
-        try:
-            year = int(year_str)
-        except ValueError:
-            print(f"[WARN] Skipping unrecognised filename: {filename}")
-            continue
+def journal_path(output_path):
+    return f"{output_path}.journal.jsonl"
 
-        filepath = os.path.join(data_dir, filename)
-        with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-            text = f.read()
 
-        filings.append({"ticker": ticker, "year": year, "text": text})
+def append_journal(f, result):
+    """One JSON line per filing, flushed and fsync'd so a kill loses at most the line being written."""
+    f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
 
-    print(f"[INFO] Found {len(filings)} txt files in {data_dir}/")
-    return filings
 
+def read_journal(path):
+    """All complete records in the journal; a torn trailing line from a crash is skipped."""
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"[WARN] Skipping unreadable journal line {n} in {path}")
+    return records
 
-# ── Main ──────────────────────────────────────────────────────────────────────
-def run_content_scoring(data_dir=DATA_DIR, output_path=OUTPUT_PATH):
-    filings = load_filings_from_dir(data_dir)
 
-    if not filings:
-        print(f"[ERROR] No txt files found in {data_dir}/")
-        return
+def compact_journal(output_path):
+    """Rebuilds {output_path}.parquet from the journal (last record per filing wins)."""
+    _save(pd.DataFrame(), read_journal(journal_path(output_path)), output_path)
 
-    if os.path.exists(f"{output_path}.parquet"):
-        existing = pd.read_parquet(f"{output_path}.parquet")
-        done     = set(zip(existing["ticker"], existing["year"]))
-        print(f"[INFO] Resuming — {len(done)} already scored, {len(filings) - len(done)} remaining")
-    else:
-        existing = pd.DataFrame()
-        done     = set()
 
-    results = []
-    total   = len(filings)
+# ── Load filings from data/ directory ────────────────────────────────────────
+def list_filings(data_dir):
+    """
+    (ticker, year, path) for every ticker_year.txt in data_dir, sorted by
+    filename. Only directory entries are read, never file contents.
+    """
+    entries = []
+    with os.scandir(data_dir) as it:
+        for entry in it:
+            filename = entry.name
+            if not filename.endswith(".txt") or not entry.is_file():
+                continue
+            name = filename[:-4]  # strip .txt
+            parts = name.rsplit("_", 1)
+            if len(parts) != 2:
+                print(f"[WARN] Skipping unrecognised filename: {filename}")
+                continue
+            ticker, year_str = parts
+            try:
+                year = int(year_str)
+            except ValueError:
+                print(f"[WARN] Skipping unrecognised filename: {filename}")
+                continue
+            entries.append((filename, ticker, year, entry.path))
+    return [(ticker, year, path) for _, ticker, year, path in sorted(entries)]
+
+
+def read_filing(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+def iter_filings(data_dir, skip=frozenset(), prefetch=LOAD_PREFETCH, entries=None):
+    """
+    Yields {"ticker", "year", "text"} lazily, in filename order. Keys in skip
+    are dropped before their file is opened; with prefetch > 0 that many
+    upcoming files are read by background threads. At most prefetch + 1
+    texts are held at once, whatever the corpus size.
+    """
+    entries = list_filings(data_dir) if entries is None else entries
+    todo    = ((ticker, year, path) for ticker, year, path in entries if (ticker, year) not in skip)
 
-    for idx, filing in enumerate(filings):
-        ticker = filing["ticker"]
-        year   = filing["year"]
-        text   = filing["text"]
+    if prefetch <= 0:
+        for ticker, year, path in todo:
+            yield {"ticker": ticker, "year": year, "text": read_filing(path)}
+        return
 
-        if (ticker, year) in done:
-            continue
+    with ThreadPoolExecutor(max_workers=prefetch) as executor:
+        window = deque()
+        for ticker, year, path in todo:
+            window.append((ticker, year, executor.submit(read_filing, path)))
+            if len(window) > prefetch:
+                ticker, year, future = window.popleft()
+                yield {"ticker": ticker, "year": year, "text": future.result()}
+        while window:
+            ticker, year, future = window.popleft()
+            yield {"ticker": ticker, "year": year, "text": future.result()}
+
+
+def load_filings_from_dir(data_dir):
+    """
+    Reads all ticker_year.txt files from data_dir.
+    Returns a list of dicts with ticker, year, and text.
+    """
+    filings = list(iter_filings(data_dir))
+    print(f"[INFO] Found {len(filings)} txt files in {data_dir}/")
+    return filings
 
-        print(f"[{idx+1}/{total}] Scoring {ticker} {year}...")
-        scores = score_filing(text)
 
-        result = {"ticker": ticker, "year": year}
+# ── Main ──────────────────────────────────────────────────────────────────────
+def _build_result(ticker, year, scores):
+    result = {"ticker": ticker, "year": year}
+
+    if scores is None:
+        print(f"  [SKIP] Failed — {ticker} {year}")
+        for cat in ALL_CATEGORIES:
+            result[cat]                = None
+            result[f"{cat}_rationale"] = None
+    else:
+        for cat in ALL_CATEGORIES:
+            result[cat]                = scores.get(cat, {}).get("score",     None)
+            result[f"{cat}_rationale"] = scores.get(cat, {}).get("rationale", None)
 
-        if scores is None:
-            print(f"  [SKIP] Failed — {ticker} {year}")
-            for cat in ALL_CATEGORIES:
-                result[cat]                = None
-                result[f"{cat}_rationale"] = None
-        else:
-            for cat in ALL_CATEGORIES:
-                result[cat]                = scores.get(cat, {}).get("score",     None)
-                result[f"{cat}_rationale"] = scores.get(cat, {}).get("rationale", None)
+    return result
 
-        results.append(result)
 
-        if len(results) % 10 == 0:
-            _save(existing, results, output_path)
-            print(f"  [INFO] Progress saved ({len(results)} new filings scored)")
+def run_content_scoring(data_dir=DATA_DIR, output_path=OUTPUT_PATH, max_in_flight=MAX_IN_FLIGHT,
+                        limiter=None, llm=None, use_cache=True, fallback=None, chunked=None,
+                        metrics_path=None):
+    """
+    Scores filings with up to max_in_flight concurrent requests, paced by the
+    shared RPM/TPM limiter instead of a fixed sleep. Each result is appended
+    to {output_path}.journal.jsonl as it completes; resume reads the journal,
+    and {output_path}.parquet is compacted from it at the end. Per-call
+    metrics go to metrics_path (default {output_path}_metrics.parquet).
+    """
+    entries = list_filings(data_dir)
+    print(f"[INFO] Found {len(entries)} txt files in {data_dir}/")
 
-        time.sleep(SLEEP_BETWEEN_CALLS)
+    if not entries:
+        print(f"[ERROR] No txt files found in {data_dir}/")
+        return
 
-    _save(existing, results, output_path)
+    journal = journal_path(output_path)
+    if not os.path.exists(journal) and os.path.exists(f"{output_path}.parquet"):
+        # Parquet from before the journal existed: seed the journal from it once
+        with open(journal, "w", encoding="utf-8") as f:
+            legacy = pd.read_parquet(f"{output_path}.parquet").drop(columns="specificity_score", errors="ignore")
+            legacy.to_json(f, orient="records", lines=True, force_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+    done   = {(r["ticker"], r["year"]) for r in read_journal(journal)}
+    n_done = sum((ticker, year) in done for ticker, year, _ in entries)
+    if done:
+        print(f"[INFO] Resuming — {n_done} already scored, {len(entries) - n_done} remaining")
+
+    call_metrics.reset()
+    limiter = limiter or rate_limiter
+    scored  = 0
+    total   = len(entries)
+    pending = {}
+    # Texts are read lazily (done filings never are) and only as the window frees up
+    todo    = iter_filings(data_dir, skip=done, entries=entries)
+
+    def collect(finished):
+        nonlocal scored
+        for future in finished:
+            ticker, year = pending.pop(future)
+            append_journal(log, _build_result(ticker, year, future.result()))
+            scored += 1
+
+            if scored % CHECKPOINT_EVERY == 0:
+                print(f"  [INFO] Progress: {scored} new filings scored")
+
+    # A crash mid-write leaves a torn last line; start appending on a fresh one
+    if os.path.exists(journal) and os.path.getsize(journal):
+        with open(journal, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            torn = f.read(1) != b"\n"
+        if torn:
+            with open(journal, "a", encoding="utf-8") as f:
+                f.write("\n")
+
+    with open(journal, "a", encoding="utf-8") as log, ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        for submitted, filing in enumerate(todo, n_done + 1):
+            # Keep a bounded window of submitted work so the journal stays current
+            while len(pending) >= max_in_flight * 2:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+
+            print(f"[{submitted}/{total}] Scoring {filing['ticker']} {filing['year']}...")
+            future          = executor.submit(score_with_fallback, filing["text"], limiter, use_cache, llm,
+                                             fallback, chunked)
+            pending[future] = (filing["ticker"], filing["year"])
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(finished)
+
+    compact_journal(output_path)
+    call_metrics.save(metrics_path or f"{output_path}_metrics.parquet")
 
     out = pd.read_parquet(f"{output_path}.parquet")
     print(f"\n[INFO] Done. {len(out)} filings scored.")
     print("\n[SUMMARY] Mean scores:")
     print(out[ALL_CATEGORIES + ["specificity_score"]].mean().round(3).to_string())
+    call_metrics.summary(scored)
     return out
 
 
@@ -1,9 +1,18 @@
+import numpy as np
 import pandas as pd
+from sklearn.decomposition import TruncatedSVD
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 
-PARQUET_PATH = "boilerplate_results.parquet"
-OUTPUT_PATH  = "similarity_results"
+PARQUET_PATH    = "boilerplate_results.parquet"
+OUTPUT_PATH     = "similarity_results"
+EMBEDDINGS_PATH = "doc_embeddings"
+
+# Semantic (LSA) mode
+SVD_COMPONENTS  = 100    # embedding dimension, capped at n_filings // 2 so LSA stays low-rank
+SVD_SEED        = 42
+BATCH_SIZE      = 1024   # rows per matrix-product block
 
 
 def compute_yoy_similarity(current_text, previous_text):
@@ -15,34 +24,140 @@ def compute_yoy_similarity(current_text, previous_text):
     return round(float(score), 4)
 
 
-def run_similarity(parquet_path=PARQUET_PATH, output_path=OUTPUT_PATH):
+# ── Semantic mode: LSA embeddings ─────────────────────────────────────────────
+def compute_embeddings(texts, n_components=SVD_COMPONENTS):
+    """
+    Fits TF-IDF (uni/bigrams) over the whole corpus and projects it onto
+    n_components latent dimensions with TruncatedSVD. Rows are L2-normalized
+    float32, so a dot product between two rows is their cosine similarity.
+    """
+    texts      = ["" if pd.isna(t) else t for t in texts]   # None or NaN (pandas 3 tolist) -> empty
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), min_df=2, sublinear_tf=True)
+    tfidf      = vectorizer.fit_transform(texts)
+
+    n_components = max(1, min(n_components, tfidf.shape[0] // 2, tfidf.shape[1] - 1))
+    svd          = TruncatedSVD(n_components=n_components, random_state=SVD_SEED)
+    embeddings   = svd.fit_transform(tfidf)
+
+    print(f"[INFO] LSA: {tfidf.shape[1]} terms -> {n_components} dims "
+          f"({svd.explained_variance_ratio_.sum():.1%} variance explained)")
+    return normalize(embeddings).astype(np.float32)
+
+
+def save_embeddings(embeddings, keys, path=EMBEDDINGS_PATH):
+    """Persists embeddings with their (ticker, year) keys for other stages."""
+    np.savez(
+        f"{path}.npz",
+        embeddings=embeddings,
+        ticker=keys["ticker"].to_numpy(dtype=str),
+        year=keys["year"].astype(np.int32).to_numpy(),
+    )
+    print(f"[INFO] Saved {path}.npz")
+
+
+def load_embeddings(path=EMBEDDINGS_PATH):
+    """Returns (embeddings, keys) where keys is a ticker/year DataFrame aligned to the rows."""
+    with np.load(f"{path}.npz") as data:
+        keys = pd.DataFrame({"ticker": data["ticker"], "year": data["year"]})
+        return data["embeddings"], keys
+
+
+def batched_pair_similarity(embeddings, left, right, batch_size=BATCH_SIZE):
+    """Row-wise cosine similarity between embeddings[left[i]] and embeddings[right[i]]."""
+    scores = np.empty(len(left), dtype=np.float32)
+    for start in range(0, len(left), batch_size):
+        stop = start + batch_size
+        a    = embeddings[left[start:stop]]
+        b    = embeddings[right[start:stop]]
+        scores[start:stop] = np.einsum("ij,ij->i", a, b)
+    return scores
+
+
+def batched_peer_similarity(embeddings, groups, mask=None, batch_size=BATCH_SIZE):
+    """
+    Mean cosine similarity of each filing to every other filing in the same
+    group (e.g. same fiscal year). Computed as blocked E_batch @ E_group.T
+    products so the full N x N matrix is never materialized. Rows outside
+    mask (e.g. filings without text) are left out of every group and get NaN.
+    """
+    scores = np.full(len(embeddings), np.nan, dtype=np.float32)
+    rows   = np.arange(len(embeddings)) if mask is None else np.flatnonzero(mask)
+    for _, idx in pd.Series(rows).groupby(np.asarray(groups)[rows]):
+        idx = idx.to_numpy()
+        if len(idx) < 2:
+            continue
+        group = embeddings[idx]
+        for start in range(0, len(idx), batch_size):
+            block = group[start:start + batch_size] @ group.T
+            # drop self-similarity (1.0 on the diagonal) from the mean
+            scores[idx[start:start + batch_size]] = (block.sum(axis=1) - 1.0) / (len(idx) - 1)
+    return scores
+
+
+def _previous_index(df):
+    """Positional index of each row's (ticker, year - 1) filing, -1 if none."""
+    lookup = {key: i for i, key in enumerate(zip(df["ticker"], df["year"]))}
+    return np.array([lookup.get((t, y - 1), -1) for t, y in zip(df["ticker"], df["year"])])
+
+
+def run_similarity(parquet_path=PARQUET_PATH, output_path=OUTPUT_PATH, mode="ngram",
+                   embeddings_path=EMBEDDINGS_PATH, n_components=SVD_COMPONENTS):
+    """
+    mode="ngram"    : pairwise 4-6 gram TF-IDF cosine (original behaviour)
+    mode="semantic" : LSA embeddings over the whole corpus; also adds
+                      cross_similarity (mean similarity to same-year peers)
+    """
     df = pd.read_parquet(parquet_path)
     df = df.sort_values(["ticker", "year"]).reset_index(drop=True)
 
-    similarity_scores = []
-    for idx, row in df.iterrows():
-        ticker        = row["ticker"]
-        current_year  = row["year"]
-        current_text  = row["combined_text"]
-        previous_rows = df[(df["ticker"] == ticker) & (df["year"] == current_year - 1)]
+    if mode == "semantic":
+        embeddings = compute_embeddings(df["combined_text"].fillna("").tolist(), n_components)
+        save_embeddings(embeddings, df[["ticker", "year"]], embeddings_path)
+
+        prev    = _previous_index(df)
+        has_txt = df["combined_text"].fillna("").str.len().to_numpy() > 0
+        valid   = (prev >= 0) & has_txt & has_txt[np.clip(prev, 0, None)]
+        cur_idx = np.flatnonzero(valid)
+
+        yoy          = np.full(len(df), np.nan)
+        yoy[cur_idx] = batched_pair_similarity(embeddings, cur_idx, prev[cur_idx])
+        df["yoy_similarity"]   = np.round(yoy, 4)
+        has_vec = has_txt & (np.abs(embeddings).sum(axis=1) > 0)     # text with no retained terms embeds as 0
+        df["cross_similarity"] = np.round(batched_peer_similarity(embeddings, df["year"], has_vec), 4)
+        score_cols = ["yoy_similarity", "cross_similarity"]
+
+    elif mode == "ngram":
+        similarity_scores = []
+        for idx, row in df.iterrows():
+            ticker        = row["ticker"]
+            current_year  = row["year"]
+            current_text  = row["combined_text"]
+            previous_rows = df[(df["ticker"] == ticker) & (df["year"] == current_year - 1)]
+
+            if previous_rows.empty:
+                similarity_scores.append(None)
+            else:
+                previous_text = previous_rows.iloc[0]["combined_text"]
+                similarity_scores.append(compute_yoy_similarity(current_text, previous_text))
 
-        if previous_rows.empty:
-            similarity_scores.append(None)
-        else:
-            previous_text = previous_rows.iloc[0]["combined_text"]
-            similarity_scores.append(compute_yoy_similarity(current_text, previous_text))
+        df["yoy_similarity"] = similarity_scores
+        score_cols = ["yoy_similarity"]
 
-    df["yoy_similarity"] = similarity_scores
+    else:
+        raise ValueError(f"Unknown similarity mode: {mode!r} (expected 'ngram' or 'semantic')")
 
     # Parquet keeps combined_text for downstream steps
-    df[["ticker", "company_name", "sector", "year", "has_1c",
-        "yoy_similarity", "combined_text"]].to_parquet(f"{output_path}.parquet", index=False)
+    df[["ticker", "company_name", "sector", "year", "has_1c"]
+       + score_cols + ["combined_text"]].to_parquet(f"{output_path}.parquet", index=False)
     print(f"[INFO] Saved {output_path}.parquet")
 
     return df
 
 
 if __name__ == "__main__":
-    df = run_similarity()
+    import sys
+    mode = sys.argv[1] if len(sys.argv) > 1 else "ngram"
+    df   = run_similarity(mode=mode)
     print("\n[INFO] Done.")
-    print(df[["ticker", "sector", "year", "yoy_similarity"]].to_string())
\ No newline at end of file
+    print(df[["ticker", "sector", "year"]
+             + [c for c in ("yoy_similarity", "cross_similarity") if c in df.columns]].to_string())
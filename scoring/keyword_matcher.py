@@ -0,0 +1,330 @@
+"""
+Keyword Automaton for NIST CSF Counting
+=======================================
+Counts every keyword of every function in one left-to-right scan of the
+preprocessed text, instead of one regex / str.count pass per keyword.
+
+The dictionary is compiled into an Aho-Corasick automaton with the failure
+links folded into a full transition table (one dict lookup per character).
+Matches reproduce taxonomy_scoring.count_keywords exactly:
+
+  - single-word keywords : re.findall(r'\\b' + re.escape(kw) + r'\\b') —
+                           both edges checked with Python's \\b rule
+                           (word-ness of the neighbour differs from the
+                           keyword's edge character)
+  - multi-word keywords  : str.count(kw) — plain substring, no boundaries
+  - both                 : non-overlapping per keyword (leftmost first),
+                           while different keywords may overlap freely
+  - duplicates           : a keyword listed twice (in one function or in
+                           several) is counted once per listing
+
+The compiled automaton is pickled next to this module, keyed on a hash of
+the dictionary, and rebuilt whenever the dictionary changes.
+
+TokenMatcher is the deduplicating alternative: leftmost-longest,
+non-overlapping matches over one token stream, so "soc 2" is not also a
+"soc" hit and a keyword listed under several functions is attributed
+according to a policy:
+
+  split – each listing function gets 1 / n of the hit
+  first – the first function (dictionary order) that lists it gets the hit
+  all   – every listing function gets a full hit
+
+TokenMatcher can also normalise every token of both keywords and text with
+an NLTK stemmer or lemmatizer ("porter", "snowball", "wordnet"), so
+"policy" also catches "policies" and inflected keywords collapse into one
+pattern. Per-token results are memoised in a bounded LRU cache.
+"""
+
+import os
+import json
+import pickle
+import hashlib
+import functools
+import numpy as np
+
+from token_cache import TOKEN_RE
+
+AUTOMATON_PATH  = os.path.join(os.path.dirname(os.path.abspath(__file__)), "keyword_automaton.pkl")
+SHARED_POLICIES = ("split", "first", "all")
+NORMALIZERS     = ("porter", "snowball", "wordnet")
+NORMALIZER_CACHE_SIZE = 100_000     # distinct tokens memoised per normalizer
+
+
+def _is_word(ch):
+    """Python re's \\w for str patterns: alphanumeric (str.isalnum) or underscore."""
+    return ch.isalnum() or ch == "_"
+
+
+def make_normalizer(name):
+    """Memoised token -> base form function for name (None: identity, returned as None)."""
+    if name is None:
+        return None
+    if name == "porter":
+        from nltk.stem import PorterStemmer
+        fn = PorterStemmer().stem
+    elif name == "snowball":
+        from nltk.stem import SnowballStemmer
+        fn = SnowballStemmer("english").stem
+    elif name == "wordnet":
+        import nltk
+        from nltk.stem import WordNetLemmatizer
+        try:
+            nltk.data.find("corpora/wordnet")
+        except LookupError:
+            nltk.download("wordnet", quiet=True)
+        fn = WordNetLemmatizer().lemmatize
+        try:
+            fn("policies")      # loads the corpus now rather than mid-scan
+        except LookupError:
+            raise RuntimeError("The wordnet normalizer needs the NLTK WordNet corpus, and it could not "
+                               "be downloaded; install it with: python -m nltk.downloader wordnet") from None
+    else:
+        raise ValueError(f"Unknown normalizer: {name!r} (expected one of {NORMALIZERS} or None)")
+    return functools.lru_cache(maxsize=NORMALIZER_CACHE_SIZE)(fn)
+
+
+def _check_policy(policy):
+    if policy not in SHARED_POLICIES:
+        raise ValueError(f"Unknown shared-keyword policy: {policy!r} (expected one of {SHARED_POLICIES})")
+
+
+def dictionary_hash(keywords):
+    return hashlib.sha256(json.dumps(keywords, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class KeywordAutomaton:
+    """
+    keywords: {function: [keyword, ...]}. Patterns are the distinct keyword
+    strings; weights[p] maps pattern p to {function: times listed}.
+    """
+
+    def __init__(self, keywords):
+        self.functions = list(keywords)
+        self.hash      = dictionary_hash(keywords)
+        self.patterns  = []
+        self.weights   = []
+        index          = {}
+        for func, kws in keywords.items():
+            for kw in kws:
+                if kw not in index:
+                    index[kw] = len(self.patterns)
+                    self.patterns.append(kw)
+                    self.weights.append({})
+                w = self.weights[index[kw]]
+                w[func] = w.get(func, 0) + 1
+
+        self.lengths = [len(p) for p in self.patterns]
+        # \b checks apply to single-word keywords only (str.count has none)
+        self.bounded = [" " not in p for p in self.patterns]
+        self.start_w = [bool(p) and _is_word(p[0]) for p in self.patterns]
+        self.end_w   = [bool(p) and _is_word(p[-1]) for p in self.patterns]
+        self._compile()
+
+    def _compile(self):
+        goto, fail, out = [{}], [0], [[]]
+        for pid, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                if ch not in goto[state]:
+                    goto.append({})
+                    fail.append(0)
+                    out.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            if pattern:
+                out[state].append(pid)
+
+        # Breadth-first: failure links, output inheritance, and the full
+        # transition table delta[s] = goto[s] merged over delta[fail[s]]
+        delta = [dict(goto[0])]
+        delta.extend({} for _ in range(len(goto) - 1))
+        queue = list(goto[0].values())
+        head  = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            out[state]   = out[state] + out[fail[state]]
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0) if state else 0
+                queue.append(nxt)
+
+        self.delta  = delta
+        self.output = [tuple(o) for o in out]
+
+    def iter_matches(self, text):
+        """
+        Yields (start, end, pattern_id) for every counted hit, in order of
+        end position, applying the boundary and non-overlap rules above.
+        """
+        delta, output = self.delta, self.output
+        lengths, bounded, start_w, end_w = self.lengths, self.bounded, self.start_w, self.end_w
+        last_end = {}
+        n        = len(text)
+        state    = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if not output[state]:
+                continue
+            end = i + 1
+            for pid in output[state]:
+                start = end - lengths[pid]
+                if start < last_end.get(pid, 0):
+                    continue
+                if bounded[pid]:
+                    if (start > 0 and _is_word(text[start - 1])) == start_w[pid]:
+                        continue
+                    if (end < n and _is_word(text[end])) == end_w[pid]:
+                        continue
+                last_end[pid] = end
+                yield start, end, pid
+
+    def pattern_counts(self, text):
+        counts = [0] * len(self.patterns)
+        for _, _, pid in self.iter_matches(text):
+            counts[pid] += 1
+        return counts
+
+    def weight_matrix(self):
+        """P x F array: hits contributed to each function by one match of pattern p."""
+        W = np.zeros((len(self.patterns), len(self.functions)))
+        for pid, w in enumerate(self.weights):
+            for func, times in w.items():
+                W[pid, self.functions.index(func)] = times
+        return W
+
+    def count(self, text):
+        """{function: k_f} for preprocessed text; equal to count_keywords per function."""
+        counts = dict.fromkeys(self.functions, 0)
+        for pid, n in enumerate(self.pattern_counts(text)):
+            if n:
+                for func, times in self.weights[pid].items():
+                    counts[func] += n * times
+        return counts
+
+
+class TokenMatcher:
+    """
+    keywords: {function: [keyword, ...]}. Keywords and text are both split
+    with TOKEN_RE (hyphens, '&' etc. separate tokens on both sides) and
+    passed through the same optional normalizer. The scan is one pass over
+    the tokens whatever the dictionary size: at each position the trie
+    gives the longest keyword starting there, which is taken and skipped
+    over.
+    """
+
+    def __init__(self, keywords, normalizer=None):
+        self.functions  = list(keywords)
+        self.normalizer = normalizer
+        self.normalize  = make_normalizer(normalizer)
+        self.patterns  = []                 # token tuples
+        self.owners    = []                 # listing functions per pattern, dictionary order
+        self.trie      = {}
+        index          = {}
+        for func, kws in keywords.items():
+            for kw in kws:
+                tokens = self.tokens(kw.lower())
+                if not tokens:
+                    continue
+                if tokens not in index:
+                    index[tokens] = len(self.patterns)
+                    self.patterns.append(tokens)
+                    self.owners.append([])
+                    node = self.trie
+                    for tok in tokens:
+                        node = node.setdefault(tok, {})
+                    node[None] = index[tokens]          # None marks a complete keyword
+                owners = self.owners[index[tokens]]
+                if func not in owners:
+                    owners.append(func)
+
+    def tokens(self, text):
+        """Normalised token tuple for text (the form patterns are stored in)."""
+        tokens = TOKEN_RE.findall(text)
+        return tuple(map(self.normalize, tokens) if self.normalize else tokens)
+
+    def key(self, keyword):
+        """Vocabulary entry a keyword maps to: its normalised tokens joined by spaces."""
+        return " ".join(self.tokens(keyword.lower()))
+
+    def iter_matches(self, text):
+        """Yields (start, end, pattern_id) character spans, leftmost-longest and non-overlapping."""
+        norm   = self.normalize or (lambda tok: tok)
+        tokens = [(norm(m.group()), m.start(), m.end()) for m in TOKEN_RE.finditer(text)]
+        n, i   = len(tokens), 0
+        while i < n:
+            node, best, j = self.trie, None, i
+            while j < n and tokens[j][0] in node:
+                node = node[tokens[j][0]]
+                j   += 1
+                if None in node:
+                    best = (j, node[None])
+            if best is None:
+                i += 1
+                continue
+            j, pid = best
+            yield tokens[i][1], tokens[j - 1][2], pid
+            i = j
+
+    def all_ngrams(self, text):
+        """
+        Every keyword n-gram occurring in text, overlaps included (what
+        CountVectorizer's n-gram analyzer would emit, restricted to the
+        dictionary). Used as the analyzer for the corpus count matrix.
+        """
+        tokens = self.tokens(text)
+        found  = []
+        for i in range(len(tokens)):
+            node, j = self.trie, i
+            while j < len(tokens) and tokens[j] in node:
+                node = node[tokens[j]]
+                j   += 1
+                if None in node:
+                    found.append(" ".join(tokens[i:j]))
+        return found
+
+    def weight_matrix(self, policy="split"):
+        """P x F array: share of one match of pattern p attributed to each function under policy."""
+        _check_policy(policy)
+        W = np.zeros((len(self.patterns), len(self.functions)))
+        for pid, owners in enumerate(self.owners):
+            targets = owners[:1] if policy == "first" else owners
+            for func in targets:
+                W[pid, self.functions.index(func)] = 1 / len(owners) if policy == "split" else 1
+        return W
+
+    def count(self, text, policy="split"):
+        """{function: deduplicated hits}; floats under the split policy."""
+        _check_policy(policy)
+        counts = dict.fromkeys(self.functions, 0.0 if policy == "split" else 0)
+        for _, _, pid in self.iter_matches(text):
+            owners = self.owners[pid]
+            if policy == "first":
+                counts[owners[0]] += 1
+            else:
+                share = 1 / len(owners) if policy == "split" else 1
+                for func in owners:
+                    counts[func] += share
+        return counts
+
+
+def load_automaton(keywords, path=AUTOMATON_PATH):
+    """The automaton for keywords, unpickled from path if it was built from the same dictionary."""
+    expected = dictionary_hash(keywords)
+    if path and os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                automaton = pickle.load(f)
+            if getattr(automaton, "hash", None) == expected:
+                return automaton
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass
+
+    automaton = KeywordAutomaton(keywords)
+    if path:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(automaton, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    return automaton
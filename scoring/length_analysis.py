@@ -1,34 +1,21 @@
 import pandas as pd
-import openpyxl
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from metadata import load_metadata
+from token_cache import SECTION_MARKER, SENTENCE_END, PARAGRAPH_SEP
 
 PARQUET_PATH = "filings.parquet"
 EXCEL_PATH   = "data_sample.xlsx"
 OUTPUT_PATH  = "length_results"
 
-
-def load_metadata(excel_path):
-    wb      = openpyxl.load_workbook(excel_path)
-    ws      = wb.active
-    headers = [cell.value for cell in ws[1]]
-    metadata = {}
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        row_dict = dict(zip(headers, row))
-        ticker   = row_dict.get("ticker")
-        if ticker:
-            metadata[ticker] = {
-                "size":       row_dict.get("size"),
-                "market_cap": row_dict.get("market cap"),
-            }
-    return pd.DataFrame.from_dict(metadata, orient="index").reset_index().rename(columns={"index": "ticker"})
-
-
 def compute_lengths(row):
     text   = row["combined_text"]
     has_1c = row["has_1c"]
     if not text:
         return 0, 0, 0
-    if has_1c and "--- ITEM 1C ---" in text:
-        parts  = text.split("--- ITEM 1C ---")
+    if has_1c and SECTION_MARKER in text:
+        parts  = text.split(SECTION_MARKER)
         len_1a = len(parts[0].split())
         len_1c = len(parts[1].split())
     else:
@@ -37,17 +24,79 @@ def compute_lengths(row):
     return len_1a, len_1c, len_1a + len_1c
 
 
-def run_length_analysis(parquet_path=PARQUET_PATH, excel_path=EXCEL_PATH, output_path=OUTPUT_PATH):
+def _word_counts(text):
+    """len(str.split()) for every element of an Arrow string array."""
+    trimmed = pc.utf8_trim_whitespace(text)
+    n_parts = pc.list_value_length(pc.utf8_split_whitespace(trimmed))
+    # "" still splits into one empty part
+    return pc.subtract(n_parts, pc.cast(pc.equal(pc.utf8_length(trimmed), 0), pa.int32()))
+
+
+def compute_lengths_vectorized(df):
+    """
+    Whole-table equivalent of compute_lengths on pyarrow.compute kernels (no
+    per-row Python). Also counts sentences (terminal punctuation runs, plus a
+    trailing unterminated one) and paragraphs (blank-line separated blocks).
+    """
+    text   = pc.fill_null(pa.array(df["combined_text"], type=pa.string(), from_pandas=True), "")
+    has_1c = pc.fill_null(pa.array(df["has_1c"], type=pa.bool_(), from_pandas=True), False)
+
+    # Appending the marker guarantees two parts; parts[1] is "" when there was none
+    parts    = pc.split_pattern(pc.binary_join_element_wise(text, SECTION_MARKER, ""), SECTION_MARKER)
+    marker   = pc.match_substring(text, SECTION_MARKER)
+    use_1c   = pc.and_(has_1c, marker)
+    words_1a = _word_counts(pc.list_element(parts, 0))
+    words_1c = _word_counts(pc.list_element(parts, 1))
+
+    # Without a marker parts[0] is the whole text; only marker rows that are
+    # not flagged has_1c (rare) need a separate full-text count
+    words = words_1a
+    if pc.any(pc.and_(marker, pc.invert(has_1c))).as_py():
+        words = pc.if_else(marker, _word_counts(text), words_1a)
+
+    len_1a = pc.if_else(use_1c, words_1a, words)
+    len_1c = pc.if_else(use_1c, words_1c, 0)
+
+    trimmed    = pc.utf8_trim_whitespace(text)
+    nonempty   = pc.cast(pc.greater(pc.utf8_length(trimmed), 0), pa.int32())
+    unfinished = pc.cast(pc.invert(pc.match_substring_regex(trimmed, r"[.!?]$")), pa.int32())
+    sentences  = pc.add(pc.count_substring_regex(trimmed, SENTENCE_END), pc.multiply(nonempty, unfinished))
+    paragraphs = pc.add(pc.count_substring_regex(trimmed, PARAGRAPH_SEP), nonempty)
+
+    return pd.DataFrame({
+        "len_1a":       len_1a.to_numpy(zero_copy_only=False),
+        "len_1c":       len_1c.to_numpy(zero_copy_only=False),
+        "len_combined": pc.add(len_1a, len_1c).to_numpy(zero_copy_only=False),
+        "n_sentences":  sentences.to_numpy(zero_copy_only=False),
+        "n_paragraphs": paragraphs.to_numpy(zero_copy_only=False),
+    }, index=df.index)
+
+
+def run_length_analysis(parquet_path=PARQUET_PATH, excel_path=EXCEL_PATH, output_path=OUTPUT_PATH,
+                        companyfacts_path=None):
     df       = pd.read_parquet(parquet_path)
     metadata = load_metadata(excel_path)
 
     df = df.merge(metadata, on="ticker", how="left")
-    df[["len_1a", "len_1c", "len_combined"]] = df.apply(compute_lengths, axis=1, result_type="expand")
+    df = df.join(compute_lengths_vectorized(df))
+
+    # Optional XBRL lookup from companyfacts.py (public float, shares, SIC)
+    xbrl_cols = []
+    if companyfacts_path:
+        xbrl_cols = ["public_float", "shares_outstanding", "sic"]
+        facts = (
+            pd.read_parquet(companyfacts_path, columns=["ticker", "fiscal_year"] + xbrl_cols)
+            .dropna(subset=["ticker"])
+            .drop_duplicates(["ticker", "fiscal_year"], keep="last")
+            .rename(columns={"fiscal_year": "year"})
+        )
+        facts = facts.astype({"year": df["year"].dtype, "sic": "Int16"})
+        df    = df.merge(facts, on=["ticker", "year"], how="left")
 
     # Parquet keeps combined_text and size for downstream steps
     parquet_df = df[["ticker", "company_name", "sector", "year", "has_1c",
-                     "size", "market_cap", "len_1a", "len_1c", "len_combined",
-                     "combined_text"]]
+                     "size", "market_cap", "market_cap_usd", "len_1a", "len_1c", "len_combined",
+                     "n_sentences", "n_paragraphs"] + xbrl_cols + ["combined_text"]]
     parquet_df.to_parquet(f"{output_path}.parquet", index=False)
     print(f"[INFO] Saved {output_path}.parquet")
 
@@ -0,0 +1,351 @@
+"""
+LLM Backends
+============
+Pluggable text-generation backends for content_scoring.py:
+
+  gemini – Google Gemini via google-genai (client built lazily, on first call)
+  mock   – in-process fake returning schema-valid scoring JSON with
+           configurable latency, error rate, 429 rate and malformed output
+  http   – client for the mock served over HTTP (serve_mock), so the
+           pipeline can be load-tested end to end on a disconnected box
+
+Select with LLM_BACKEND=gemini|mock|http (see get_backend). Mock knobs:
+MOCK_LATENCY, MOCK_JITTER, MOCK_ERROR_RATE, MOCK_429_RATE, MOCK_MALFORMED_RATE,
+MOCK_SEED; HTTP: MOCK_URL.
+
+Prefix caching: generate(text, prefix=...) sends a static instruction prefix
+that the provider can keep server-side (Gemini context caching), so only
+`text` is sent and billed at the full input rate. Caches live for
+PREFIX_CACHE_TTL seconds (0 disables) and are re-created on expiry. The mock
+simulates this: prefix tokens are reported as cached and cost no latency.
+
+Gemini only caches contents of at least PREFIX_CACHE_MIN_TOKENS (1,024 for
+Gemini 2.5 Flash). Shorter prefixes are sent inline without a create
+attempt, and the mock applies the same floor. The scoring PROMPT in
+content_scoring.py is ~3.8k characters (~950 tokens), so with the defaults
+prefix caching is inactive for it; it only takes effect once the static
+prefix grows past the minimum (set PREFIX_CACHE_MIN_TOKENS=0 to exercise
+the code path on the mock).
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+import urllib.error
+import urllib.request
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCORING_CATEGORIES = [
+    "frameworks", "specific_controls", "named_individuals", "quantitative_data",
+    "product_names", "technical_details", "llm_boilerplate",
+]
+MOCK_PORT = 8765
+PREFIX_CACHE_TTL = int(os.environ.get("PREFIX_CACHE_TTL", 3600))
+PREFIX_CACHE_MIN_TOKENS = int(os.environ.get("PREFIX_CACHE_MIN_TOKENS", 1024))   # provider minimum for cached content
+
+
+class BackendError(Exception):
+    """Request failed; not worth retrying as-is."""
+
+
+class RateLimitError(BackendError):
+    """Provider answered 429 / quota exhausted; retry after backing off."""
+
+
+@dataclass
+class LLMResponse:
+    text:            str
+    prompt_tokens:   int | None = None   # None when the provider doesn't report usage
+    response_tokens: int | None = None
+    cached_tokens:   int = 0             # part of prompt_tokens served from a prefix cache
+
+
+class PrefixCache:
+    """
+    Tracks provider-side prefix caches by content hash: create(prefix) is
+    called when there is no live entry, and an entry is treated as expired
+    EXPIRY_MARGIN seconds before its TTL so a request never races the expiry.
+    """
+    EXPIRY_MARGIN = 30
+
+    def __init__(self, ttl, create):
+        self.ttl     = ttl
+        self.create  = create
+        self.entries = {}       # sha256(prefix) -> (handle, expires_at)
+        self.lock    = threading.Lock()
+        self.creates = 0
+
+    def get(self, prefix):
+        key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        with self.lock:
+            # A None handle (creation refused) is remembered too, and retried after the TTL
+            handle, expires_at = self.entries.get(key, (None, 0.0))
+            if time.monotonic() >= expires_at - min(self.EXPIRY_MARGIN, self.ttl / 2):
+                handle = self.create(prefix)
+                self.entries[key] = (handle, time.monotonic() + self.ttl)
+                self.creates += 1
+            return handle
+
+    def invalidate(self, prefix):
+        with self.lock:
+            self.entries.pop(hashlib.sha256(prefix.encode("utf-8")).hexdigest(), None)
+
+
+class LLMBackend(ABC):
+    name = "base"
+
+    def __init__(self, model):
+        self.model = model
+
+    @property
+    def cache_id(self):
+        """Identity used in response-cache keys; differs per backend so fakes never poison real entries."""
+        return f"{self.name}/{self.model}"
+
+    @abstractmethod
+    def generate(self, prompt, prefix=""):
+        """Answer for prefix + prompt; backends that can cache the prefix server-side do."""
+
+
+# ── Gemini ────────────────────────────────────────────────────────────────────
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+
+    def __init__(self, model, api_key=None, prefix_ttl=PREFIX_CACHE_TTL):
+        super().__init__(model)
+        self.api_key  = api_key or os.environ.get("GEMINI_API_KEY")
+        self._client  = None
+        self._lock    = threading.Lock()
+        self.prefixes = PrefixCache(prefix_ttl, self._create_cache) if prefix_ttl > 0 else None
+
+    @property
+    def cache_id(self):
+        return self.model
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from google import genai
+                self._client = genai.Client(api_key=self.api_key)
+        return self._client
+
+    def _create_cache(self, prefix):
+        """Server-side cached content for prefix; None if it is below the minimum size or the provider refuses it."""
+        from google.genai import errors, types
+
+        try:
+            n_tokens = self.client.models.count_tokens(model=self.model, contents=prefix).total_tokens
+        except errors.APIError:
+            n_tokens = len(prefix) // 4
+        if n_tokens < PREFIX_CACHE_MIN_TOKENS:
+            print(f"  [INFO] Prefix is {n_tokens} tokens, below the {PREFIX_CACHE_MIN_TOKENS}-token "
+                  f"caching minimum — sending it inline")
+            return None
+        try:
+            cache = self.client.caches.create(
+                model=self.model,
+                config=types.CreateCachedContentConfig(contents=[prefix], ttl=f"{self.prefixes.ttl}s"),
+            )
+            return cache.name
+        except errors.APIError as e:
+            print(f"  [WARN] Prefix cache not created ({e.code}) — sending the prefix inline")
+            return None
+
+    def generate(self, prompt, prefix="", _recreated=False):
+        from google.genai import errors, types
+
+        cache_name = self.prefixes.get(prefix) if prefix and self.prefixes else None
+        try:
+            if cache_name:
+                response = self.client.models.generate_content(
+                    model=self.model, contents=prompt,
+                    config=types.GenerateContentConfig(cached_content=cache_name),
+                )
+            else:
+                response = self.client.models.generate_content(model=self.model, contents=prefix + prompt)
+        except errors.APIError as e:
+            if e.code == 429:
+                raise RateLimitError(str(e)) from e
+            if cache_name and e.code in (400, 403, 404) and not _recreated:
+                # Cache expired or was deleted server-side: forget it and re-create once
+                self.prefixes.invalidate(prefix)
+                return self.generate(prompt, prefix, _recreated=True)
+            raise BackendError(str(e)) from e
+
+        usage = getattr(response, "usage_metadata", None)
+        return LLMResponse(
+            text=response.text or "",
+            prompt_tokens=getattr(usage, "prompt_token_count", None),
+            response_tokens=getattr(usage, "candidates_token_count", None),
+            cached_tokens=getattr(usage, "cached_content_token_count", None) or 0,
+        )
+
+
+# ── Mock ──────────────────────────────────────────────────────────────────────
+class MockBackend(LLMBackend):
+    """
+    Deterministic stand-in: scores are derived from a hash of the prompt, so
+    the same filing always gets the same answer (cache and resume tests
+    stay stable). Failures are drawn from a seeded RNG. Latency scales with
+    the uncached share of the prompt, so prefix caching shows up in timings.
+    """
+    name = "mock"
+
+    def __init__(self, model="mock", latency=0.2, jitter=0.1, error_rate=0.0,
+                 rate_limit_rate=0.0, malformed_rate=0.0, seed=None, prefix_ttl=PREFIX_CACHE_TTL,
+                 prefix_min_tokens=PREFIX_CACHE_MIN_TOKENS):
+        super().__init__(model)
+        self.prefix_min_tokens = prefix_min_tokens
+        self.prefixes          = PrefixCache(prefix_ttl, self._create_cache) if prefix_ttl > 0 else None
+        self.latency           = latency
+        self.jitter            = jitter
+        self.error_rate        = error_rate
+        self.rate_limit_rate   = rate_limit_rate
+        self.malformed_rate    = malformed_rate
+        self._rng              = random.Random(seed)
+        self._lock             = threading.Lock()
+        self.calls             = 0
+
+    def _create_cache(self, prefix):
+        """Same size floor as Gemini, so mock runs don't report savings the real backend can't get."""
+        return "mock-cache" if len(prefix) // 4 >= self.prefix_min_tokens else None
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            return self._rng.random(), self._rng.uniform(-self.jitter, self.jitter)
+
+    def answer(self, prompt):
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+        return {
+            cat: {
+                "score":     rng.randint(0, 5) if cat == "llm_boilerplate" else rng.randint(0, 1),
+                "rationale": f"mock evidence for {cat}",
+            }
+            for cat in SCORING_CATEGORIES
+        }
+
+    def generate(self, prompt, prefix=""):
+        cached = len(prefix) if prefix and self.prefixes and self.prefixes.get(prefix) else 0
+        full   = prefix + prompt
+        roll, jitter = self._draw()
+        time.sleep(max(0.0, self.latency * (1 - cached / max(len(full), 1)) + jitter))
+
+        if roll < self.rate_limit_rate:
+            raise RateLimitError("429 RESOURCE_EXHAUSTED (mock)")
+        roll -= self.rate_limit_rate
+        if roll < self.error_rate:
+            raise BackendError("500 INTERNAL (mock)")
+        roll -= self.error_rate
+
+        text = json.dumps(self.answer(full), indent=2)
+        if roll < self.malformed_rate:
+            text = "```json\n" + text[:len(text) // 2]   # truncated, fenced
+        return LLMResponse(
+            text=text,
+            prompt_tokens=len(full) // 4 + 1,
+            response_tokens=len(text) // 4 + 1,
+            cached_tokens=cached // 4,
+        )
+
+
+def serve_mock(backend=None, host="127.0.0.1", port=MOCK_PORT):
+    """
+    Serves a backend over HTTP: POST / with {"prompt": ..., "prefix": ...}
+    returns {"text", "prompt_tokens", "response_tokens", "cached_tokens"},
+    or status 429 / 500.
+    Blocks until interrupted.
+    """
+    backend = backend or mock_from_env()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            try:
+                r = backend.generate(body.get("prompt", ""), body.get("prefix", ""))
+                status, payload = 200, r.__dict__
+            except RateLimitError as e:
+                status, payload = 429, {"error": str(e)}
+            except BackendError as e:
+                status, payload = 500, {"error": str(e)}
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"[INFO] Mock LLM serving on http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class HTTPBackend(LLMBackend):
+    name = "http"
+
+    def __init__(self, model="mock", url=None, timeout=60):
+        super().__init__(model)
+        self.url     = url or os.environ.get("MOCK_URL", f"http://127.0.0.1:{MOCK_PORT}/")
+        self.timeout = timeout
+
+    def generate(self, prompt, prefix=""):
+        request = urllib.request.Request(
+            self.url, data=json.dumps({"prompt": prompt, "prefix": prefix}).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+                body = json.loads(resp.read())
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                raise RateLimitError(f"429 from {self.url}") from e
+            raise BackendError(f"{e.code} from {self.url}") from e
+        except urllib.error.URLError as e:
+            raise BackendError(str(e)) from e
+        return LLMResponse(body["text"], body.get("prompt_tokens"), body.get("response_tokens"),
+                           body.get("cached_tokens") or 0)
+
+
+# ── Factory ───────────────────────────────────────────────────────────────────
+def mock_from_env(model="mock"):
+    env = os.environ.get
+    return MockBackend(
+        model=model,
+        latency=float(env("MOCK_LATENCY", 0.2)),
+        jitter=float(env("MOCK_JITTER", 0.1)),
+        error_rate=float(env("MOCK_ERROR_RATE", 0.0)),
+        rate_limit_rate=float(env("MOCK_429_RATE", 0.0)),
+        malformed_rate=float(env("MOCK_MALFORMED_RATE", 0.0)),
+        seed=int(env("MOCK_SEED")) if env("MOCK_SEED") else None,
+        prefix_ttl=int(env("MOCK_PREFIX_CACHE_TTL", PREFIX_CACHE_TTL)),
+    )
+
+
+def get_backend(name=None, model=None):
+    name = (name or os.environ.get("LLM_BACKEND", "gemini")).lower()
+    if name == "gemini":
+        return GeminiBackend(model)
+    if name == "mock":
+        return mock_from_env(model or "mock")
+    if name == "http":
+        return HTTPBackend(model or "mock")
+    raise ValueError(f"Unknown LLM backend: {name!r} (expected gemini, mock or http)")
+
+
+if __name__ == "__main__":
+    import sys
+    serve_mock(port=int(sys.argv[1]) if len(sys.argv) > 1 else MOCK_PORT)
@@ -0,0 +1,58 @@
+"""
+Content-Addressed LLM Response Cache
+====================================
+Persists raw LLM responses and their parsed JSON under a key derived from
+everything that determines the answer: model name, prompt header and the
+exact text sent. Re-scoring an unchanged corpus never re-sends a request;
+editing the prompt or switching model misses only for the affected calls.
+
+Layout: CACHE_DIR/<key[:2]>/<key>.json, written atomically (tmp + rename)
+so concurrent workers and killed runs never leave partial entries.
+"""
+
+import os
+import json
+import time
+import hashlib
+
+CACHE_DIR = "llm_cache"
+
+
+def _sha256(s):
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+def cache_key(model, prompt, text):
+    """Stable key for (model, prompt, text); each part is hashed separately so no separator can collide."""
+    return _sha256("\n".join([_sha256(model), _sha256(prompt), _sha256(text)]))
+
+
+def _path(key, cache_dir):
+    return os.path.join(cache_dir, key[:2], f"{key}.json")
+
+
+def get(key, cache_dir=CACHE_DIR):
+    """Returns the cached record (dict with raw, parsed, ...) or None."""
+    try:
+        with open(_path(key, cache_dir), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def put(key, raw, parsed, model, prompt, text, cache_dir=CACHE_DIR):
+    path = _path(key, cache_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    record = {
+        "model":         model,
+        "prompt_sha256": _sha256(prompt),
+        "text_sha256":   _sha256(text),
+        "created":       time.time(),
+        "raw":           raw,
+        "parsed":        parsed,
+    }
+    tmp = f"{path}.{os.getpid()}.{time.monotonic_ns()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    os.replace(tmp, path)
+    return record
@@ -0,0 +1,127 @@
+"""
+LLM Call Metrics
+================
+Per-call accounting for the content-scoring stage. Every API call (and every
+response-cache hit) becomes one record:
+
+  ts, model, kind        – wall-clock start, backend cache_id, "score" /
+                           "followup" / "cache"
+  prompt_tokens,
+  response_tokens        – as reported by the API, else estimated locally
+  cached_tokens          – part of prompt_tokens served from a prefix cache
+  tokens_estimated       – True when either count is a local estimate
+  wait_s, latency_s      – time spent in the rate limiter / in the call
+  retries, status        – 429 retries before the outcome; "ok" /
+                           "rate_limited" / "error" / "hit"
+
+Records are appended to a parquet per run (run_id column) and summarised as
+throughput, latency percentiles and estimated spend. Prices are USD per
+million tokens (GEMINI_PRICE_INPUT / GEMINI_PRICE_CACHED / GEMINI_PRICE_OUTPUT);
+prefix-cache storage is not included.
+"""
+
+import os
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+PRICE_INPUT  = float(os.environ.get("GEMINI_PRICE_INPUT", 0.30))    # USD / 1M prompt tokens
+PRICE_CACHED = float(os.environ.get("GEMINI_PRICE_CACHED", 0.03))   # USD / 1M prompt tokens read from a prefix cache
+PRICE_OUTPUT = float(os.environ.get("GEMINI_PRICE_OUTPUT", 2.50))   # USD / 1M response tokens
+
+
+class CallMetrics:
+    """Thread-safe collector; one instance per scoring run."""
+
+    def __init__(self):
+        self.lock    = threading.Lock()
+        self.records = []
+        self.started = time.time()
+        self.run_id  = time.strftime("%Y%m%dT%H%M%S")
+
+    def reset(self):
+        with self.lock:
+            self.records = []
+            self.started = time.time()
+            self.run_id  = time.strftime("%Y%m%dT%H%M%S")
+
+    def record(self, model, kind, prompt_tokens, response_tokens, tokens_estimated=False,
+               wait_s=0.0, latency_s=0.0, retries=0, status="ok", cached_tokens=0):
+        entry = {
+            "run_id": self.run_id, "ts": time.time() - latency_s - wait_s, "model": model, "kind": kind,
+            "prompt_tokens": int(prompt_tokens), "response_tokens": int(response_tokens),
+            "cached_tokens": int(cached_tokens),
+            "tokens_estimated": bool(tokens_estimated), "wait_s": float(wait_s),
+            "latency_s": float(latency_s), "retries": int(retries), "status": status,
+        }
+        with self.lock:
+            self.records.append(entry)
+
+    def to_frame(self):
+        with self.lock:
+            return pd.DataFrame(self.records)
+
+    def save(self, path):
+        """Appends this run's records to the metrics parquet at path."""
+        df = self.to_frame()
+        if df.empty:
+            return
+        if os.path.exists(path):
+            previous = pd.read_parquet(path)
+            df       = pd.concat([previous[previous["run_id"] != self.run_id], df], ignore_index=True)
+        tmp_path = f"{path}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        print(f"[INFO] Saved {path}")
+
+    def summary(self, n_filings=None):
+        """Prints throughput, latency percentiles and estimated spend for this run."""
+        df = self.to_frame()
+        if df.empty:
+            print("\n[METRICS] No LLM calls recorded")
+            return {}
+
+        elapsed = max(time.time() - self.started, 1e-9)
+        calls   = df[df["kind"] != "cache"]
+        ok      = calls[calls["status"] == "ok"]
+        hits    = int((df["kind"] == "cache").sum())
+        tok_in  = int(calls["prompt_tokens"].sum())
+        tok_out = int(calls["response_tokens"].sum())
+        cached  = int(calls["cached_tokens"].sum())
+        spend   = ((tok_in - cached) * PRICE_INPUT + cached * PRICE_CACHED + tok_out * PRICE_OUTPUT) / 1e6
+        p50, p95, p99 = (np.percentile(ok["latency_s"], [50, 95, 99]) if len(ok) else (np.nan,) * 3)
+
+        stats = {
+            "elapsed_s":        elapsed,
+            "api_calls":        len(calls),
+            "followup_calls":   int((calls["kind"] == "followup").sum()),
+            "failed_calls":     int((calls["status"] != "ok").sum()),
+            "retries_429":      int(calls["retries"].sum()),
+            "cache_hits":       hits,
+            "prompt_tokens":    tok_in,
+            "cached_tokens":    cached,
+            "response_tokens":  tok_out,
+            "estimated_tokens": bool(calls["tokens_estimated"].any()),
+            "calls_per_min":    len(calls) / elapsed * 60,
+            "tokens_per_min":   (tok_in + tok_out) / elapsed * 60,
+            "latency_p50_s":    p50,
+            "latency_p95_s":    p95,
+            "latency_p99_s":    p99,
+            "mean_wait_s":      float(calls["wait_s"].mean()) if len(calls) else 0.0,
+            "estimated_usd":    spend,
+        }
+        if n_filings:
+            stats["filings_per_min"] = n_filings / elapsed * 60
+            stats["usd_per_filing"]  = spend / n_filings
+
+        print("\n[METRICS] Content-scoring calls:")
+        for name, value in stats.items():
+            if isinstance(value, float):
+                print(f"  {name:<18} {value:,.4f}" if "usd" in name else f"  {name:<18} {value:,.3f}")
+            else:
+                print(f"  {name:<18} {value}")
+        return stats
+
+
+call_metrics = CallMetrics()
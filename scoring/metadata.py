@@ -0,0 +1,122 @@
+"""
+Cached Excel Ingestion
+======================
+Converts an Excel workbook into a typed parquet sidecar once and serves the
+sidecar on later runs. The sidecar's schema metadata records the source
+file's mtime and SHA-256:
+  - mtime unchanged          -> read the sidecar (no hashing, no openpyxl)
+  - mtime changed, same hash -> refresh the stored mtime, read the sidecar
+  - content changed          -> re-read the workbook and rewrite the sidecar
+"""
+
+import os
+import hashlib
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+EXCEL_PATH = "data_sample.xlsx"
+
+MARKET_CAP_UNITS = {"K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def sidecar_path(excel_path):
+    return os.path.splitext(excel_path)[0] + ".cache.parquet"
+
+
+def _write_sidecar(df, path, mtime_ns, digest):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b"source_mtime_ns": str(mtime_ns).encode(),
+        b"source_sha256":   digest.encode(),
+    })
+    tmp = path + ".tmp"
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+
+
+def read_excel_cached(excel_path, build=None, cache_path=None):
+    """
+    Returns the workbook as a DataFrame, going through the parquet sidecar.
+    build(excel_path) -> DataFrame converts the workbook on a cache miss
+    (defaults to pd.read_excel of the first sheet).
+    """
+    cache_path = cache_path or sidecar_path(excel_path)
+    build      = build or pd.read_excel
+    mtime_ns   = os.stat(excel_path).st_mtime_ns
+
+    if os.path.exists(cache_path):
+        meta = pq.read_schema(cache_path).metadata or {}
+        if meta.get(b"source_mtime_ns") == str(mtime_ns).encode():
+            return pd.read_parquet(cache_path)
+
+        digest = _sha256(excel_path)
+        if meta.get(b"source_sha256") == digest.encode():
+            df = pd.read_parquet(cache_path)
+            _write_sidecar(df, cache_path, mtime_ns, digest)
+            return df
+    else:
+        digest = _sha256(excel_path)
+
+    print(f"[INFO] {excel_path} changed — rebuilding {cache_path}")
+    df = build(excel_path)
+    _write_sidecar(df, cache_path, mtime_ns, digest)
+    return pd.read_parquet(cache_path)
+
+
+def parse_market_cap(value):
+    """'3.83T' -> 3.83e12, '817.4M' -> 8.174e8; None if unparseable."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    s = str(value).strip().replace(",", "").replace("$", "")
+    if not s:
+        return None
+    unit = MARKET_CAP_UNITS.get(s[-1].upper())
+    try:
+        return float(s[:-1]) * unit if unit else float(s)
+    except ValueError:
+        return None
+
+
+def _read_metadata_workbook(excel_path):
+    import openpyxl  # only needed when the sidecar is stale
+
+    wb      = openpyxl.load_workbook(excel_path, read_only=True)
+    ws      = wb.active
+    rows    = ws.iter_rows(values_only=True)
+    headers = list(next(rows))
+    records = []
+    for row in rows:
+        row_dict = dict(zip(headers, row))
+        ticker   = row_dict.get("ticker")
+        if ticker:
+            records.append({
+                "ticker":     str(ticker),
+                "size":       row_dict.get("size"),
+                "market_cap": None if row_dict.get("market cap") is None else str(row_dict.get("market cap")),
+            })
+    wb.close()
+
+    df = pd.DataFrame(records, columns=["ticker", "size", "market_cap"]).drop_duplicates("ticker", keep="last")
+    df["market_cap_usd"] = df["market_cap"].map(parse_market_cap).astype("float64")
+    return df.astype({"ticker": "string", "size": "string", "market_cap": "string"}).reset_index(drop=True)
+
+
+def load_metadata(excel_path=EXCEL_PATH):
+    """ticker -> size, market_cap (raw label) and market_cap_usd, via the parquet sidecar."""
+    return read_excel_cached(excel_path, build=_read_metadata_workbook)
+
+
+if __name__ == "__main__":
+    print(load_metadata().to_string())
@@ -0,0 +1,121 @@
+"""
+BM25 Passage Selection
+======================
+Shrinks a filing to the passages most relevant to the six content-scoring
+categories before it is sent to the LLM, instead of cutting at a fixed
+character offset:
+
+  1. Split the filing into ~PASSAGE_WORDS-word passages on paragraph breaks
+  2. Keep every Item 1C passage (the cybersecurity section is always sent)
+  3. Rank the Item 1A passages with BM25 against one query per category;
+     scores are normalized per category so each category gets a say
+  4. Add the best 1A passages until the token budget is used up
+  5. Re-assemble in document order, marking gaps with "[...]"
+"""
+
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+from token_cache import SECTION_MARKER, TOKEN_RE, PARAGRAPH_RE
+
+PASSAGE_WORDS   = 150
+TOKEN_BUDGET    = 5_000
+CHARS_PER_TOKEN = 4
+GAP             = "\n\n[...]\n\n"
+
+CATEGORY_QUERIES = {
+    "frameworks":        "nist csf cybersecurity framework iso 27001 iec soc 2 type ii pci dss tisax "
+                         "hitrust cis controls certified certification audit standard",
+    "specific_controls": "multi factor authentication mfa endpoint detection response edr siem zero trust "
+                         "penetration testing encryption firewall segmentation vulnerability scanning "
+                         "phishing simulation tabletop exercise access controls",
+    "named_individuals": "chief information security officer ciso cio cto vice president years experience "
+                         "board audit committee risk committee reports directors certified cissp",
+    "quantitative_data": "number percent employees training completion million dollars insurance "
+                         "incidents per day annually quarterly hours threats blocked",
+    "product_names":     "proprietary security platform copilot for security falcon prisma cortex xsiam "
+                         "sentinel defender splunk crowdstrike okta zscaler palo alto",
+    "technical_details": "vulnerability exploit ransomware malware attack nation state password spray "
+                         "command injection remediation incident architecture segmentation ot network",
+}
+
+
+def _tokens(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def split_passages(text, target_words=PASSAGE_WORDS):
+    """Paragraph-aligned passages of roughly target_words words each."""
+    passages, buffer, size = [], [], 0
+    for para in PARAGRAPH_RE.split(text):
+        words = para.split()
+        if not words:
+            continue
+        # Very long paragraphs are cut into target-sized word windows
+        if len(words) > target_words * 2:
+            pieces = [" ".join(words[i:i + target_words]) for i in range(0, len(words), target_words)]
+        else:
+            pieces = [para]
+        for piece in pieces:
+            buffer.append(piece)
+            size += len(piece.split())
+            if size >= target_words:
+                passages.append("\n\n".join(buffer))
+                buffer, size = [], 0
+    if buffer:
+        passages.append("\n\n".join(buffer))
+    return passages
+
+
+def rank_passages(passages, queries=CATEGORY_QUERIES):
+    """Combined relevance per passage: max over categories of the per-category normalized BM25 score."""
+    if not passages:
+        return np.zeros(0)
+    bm25     = BM25Okapi([_tokens(p) or [""] for p in passages])
+    combined = np.zeros(len(passages))
+    for query in queries.values():
+        scores = bm25.get_scores(_tokens(query))
+        top    = scores.max()
+        if top > 0:
+            combined = np.maximum(combined, scores / top)
+    return combined
+
+
+def select_passages(text, token_budget=TOKEN_BUDGET, queries=CATEGORY_QUERIES):
+    """
+    Returns the reduced filing text. Item 1C is always kept in full, even if
+    it alone exceeds token_budget; Item 1A fills whatever budget remains.
+    """
+    if not text:
+        return text
+    if len(text) // CHARS_PER_TOKEN <= token_budget:
+        return text
+
+    part_1a, _, part_1c = text.partition(SECTION_MARKER)
+    passages_1a = split_passages(part_1a)
+    budget      = token_budget - len(part_1c) // CHARS_PER_TOKEN
+
+    keep = []
+    if budget > 0 and passages_1a:
+        for i in np.argsort(-rank_passages(passages_1a, queries), kind="stable"):
+            cost = len(passages_1a[i]) // CHARS_PER_TOKEN
+            if cost > budget:
+                continue
+            keep.append(i)
+            budget -= cost
+
+    # Document order, with a gap marker wherever passages were dropped
+    pieces, last = [], -1
+    for i in sorted(keep):
+        if pieces and i != last + 1:
+            pieces.append(GAP)
+        elif pieces:
+            pieces.append("\n\n")
+        pieces.append(passages_1a[i])
+        last = i
+    reduced = "".join(pieces)
+
+    if part_1c:
+        section_1c = f"{SECTION_MARKER}\n\n{part_1c.strip()}"
+        reduced    = f"{reduced}\n\n{section_1c}" if reduced else section_1c
+    return reduced
@@ -0,0 +1,89 @@
+"""
+LLM Response Validation
+=======================
+Turns raw model output into validated per-category scores for
+content_scoring.py, one category at a time, so a single bad field no longer
+throws away the whole answer:
+
+  1. Repair   – strip ``` / ```json fences, skip any preamble before the
+                first "{", ignore trailing text after the object, drop
+                trailing commas, and salvage the complete entries of a
+                truncated object
+  2. Validate – each category against a pydantic model (binary score for
+                the six specificity categories, a non-negative count for
+                llm_boilerplate)
+  3. Report   – the valid categories plus the names of the ones that are
+                missing or invalid, which the caller re-asks for
+"""
+
+import re
+import json
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+TRAILING_COMMA  = re.compile(r",\s*(?=[}\]])")
+FENCE           = re.compile(r"```(?:json)?", re.I)
+CATEGORY_OBJECT = re.compile(r'"(\w+)"\s*:\s*(\{[^{}]*\})')
+
+
+class SpecificityScore(BaseModel):
+    score:     int = Field(ge=0, le=1)
+    rationale: str = ""
+
+    @field_validator("rationale", mode="before")
+    @classmethod
+    def _none_to_empty(cls, v):
+        return "" if v is None else v
+
+
+class BoilerplateScore(SpecificityScore):
+    score: int = Field(ge=0)
+
+
+def model_for(category):
+    return BoilerplateScore if category == "llm_boilerplate" else SpecificityScore
+
+
+def extract_json(raw):
+    """
+    First JSON object in raw after repairs. If the object itself is broken
+    (typically cut off at the output-token limit), the complete
+    "category": {...} entries are salvaged; None if nothing is usable.
+    """
+    text  = FENCE.sub("", raw or "")
+    start = text.find("{")
+    if start == -1:
+        return None
+    decoder = json.JSONDecoder()
+    for candidate in (text[start:], TRAILING_COMMA.sub("", text[start:])):
+        try:
+            obj, _ = decoder.raw_decode(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(obj, dict):
+            return obj
+
+    salvaged = {}
+    for m in CATEGORY_OBJECT.finditer(text):
+        try:
+            salvaged[m.group(1)] = json.loads(TRAILING_COMMA.sub("", m.group(2)))
+        except json.JSONDecodeError:
+            continue
+    return salvaged or None
+
+
+def validate_scores(raw, categories):
+    """
+    Returns (valid, failed): valid maps category -> {"score", "rationale"}
+    for every category that parsed and validated; failed lists the rest.
+    """
+    data = extract_json(raw)
+    if data is None:
+        return {}, list(categories)
+
+    valid, failed = {}, []
+    for cat in categories:
+        try:
+            valid[cat] = model_for(cat).model_validate(data.get(cat)).model_dump()
+        except ValidationError:
+            failed.append(cat)
+    return valid, failed
@@ -0,0 +1,229 @@
+"""
+Rule-Based Content Scoring
+==========================
+Deterministic, local counterpart to the LLM scorer in content_scoring.py.
+Scores the same six specificity categories (plus llm_boilerplate) from
+gazetteers and patterns, and returns the same JSON shape as the LLM:
+
+  {"frameworks": {"score": 1, "rationale": "<evidence sentence>"}, ...}
+
+A hit only counts if its sentence is firm-specific and active, mirroring the
+prompt's validation logic:
+  - Negated     : a negation cue shortly before the match ("does not use MFA")
+  - Conditional : a hypothetical cue shortly before the match ("if we adopt",
+                  "could include ransomware")
+  - Generic     : the gazetteers only contain named frameworks, controls,
+                  products and techniques, and the sentence must refer to
+                  the firm itself ("we", "our", "the Company")
+
+Runs over the whole corpus in seconds; use as a free baseline, a pre-screen,
+or a fallback when the API is unavailable (SCORING_FALLBACK=rules).
+"""
+
+import re
+
+from boilerplate_detector import BOILERPLATE_PHRASES, normalize
+from token_cache import SECTION_MARKER, PARAGRAPH_SEP
+
+DATA_DIR    = "data"
+OUTPUT_PATH = "content_scores_rules"
+
+MAX_EVIDENCE    = 2     # sentences quoted per category
+MAX_QUOTE_CHARS = 300
+CUE_WINDOW      = 60    # characters before a match searched for negation / conditional cues
+
+# token_cache's sentence rule (punctuation run + whitespace), keeping the punctuation
+SENTENCE_SPLIT = re.compile(rf"{PARAGRAPH_SEP}|(?<=[.!?])\s+")
+
+NEGATION_CUES = re.compile(
+    r"\b(?:not|no|never|neither|nor|without|cannot|lack|lacks|absence of|none of)\b", re.I
+)
+CONDITIONAL_CUES = re.compile(
+    r"\b(?:if|could|might|would|may|whether|potential(?:ly)?|future|in the event|hypothetical|"
+    r"can be|vulnerable to|susceptible to|exposed to|risks? (?:of|from)|threats? (?:of|from|such as))\b", re.I
+)
+# The firm has to be the actor somewhere in the sentence
+FIRM_CUES = re.compile(r"\b(?:we|our|us|the company)\b", re.I)
+
+
+def _gazetteer(terms, flags=re.I):
+    """One alternation per category, longest terms first so 'NIST CSF 2.0' beats 'NIST CSF'."""
+    alternation = "|".join(re.escape(t).replace(r"\ ", r"[\s\-]?") for t in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"(?<![\w-])(?:{alternation})(?![\w-])", flags)
+
+
+FRAMEWORKS = _gazetteer([
+    "NIST CSF", "NIST CSF 2.0", "NIST Cybersecurity Framework", "National Institute of Standards and Technology",
+    "NIST SP 800-53", "NIST 800-53", "NIST SP 800-171", "NIST 800-171", "NIST Privacy Framework",
+    "ISO 27001", "ISO/IEC 27001", "ISO 27001:2013", "ISO 27001:2022", "ISO 27002", "ISO 27017",
+    "ISO 27018", "ISO 27701", "ISO 22301", "SOC 1", "SOC 2", "SOC 2 Type II", "SOC 2 Type 2",
+    "SSAE 18", "PCI DSS", "PCI-DSS", "Payment Card Industry Data Security Standard", "TISAX",
+    "HITRUST", "CIS Controls", "CIS Critical Security Controls", "COBIT", "FedRAMP", "StateRAMP",
+    "CMMC", "Cybersecurity Maturity Model Certification", "MITRE ATT&CK", "CSA STAR", "C5",
+    "Cyber Essentials", "IEC 62443", "NERC CIP",
+])
+
+SPECIFIC_CONTROLS = _gazetteer([
+    "multi-factor authentication", "multifactor authentication", "MFA", "two-factor authentication",
+    "2FA", "endpoint detection and response", "EDR", "extended detection and response", "XDR",
+    "SIEM", "security information and event management", "security operations center", "SOC 24/7",
+    "zero trust", "zero-trust architecture", "penetration test", "penetration tests",
+    "penetration testing", "red team", "red-team exercises", "bug bounty", "tabletop exercise",
+    "tabletop exercises", "phishing simulation", "phishing simulations", "encryption at rest",
+    "encryption in transit", "data loss prevention", "DLP", "privileged access management", "PAM",
+    "network segmentation", "microsegmentation", "vulnerability scanning", "vulnerability scans",
+    "web application firewall", "intrusion detection", "intrusion prevention", "single sign-on",
+    "security awareness training", "threat hunting", "immutable backups", "least privilege",
+    "role-based access", "identity and access management", "managed detection and response", "MDR",
+])
+
+PRODUCT_NAMES = _gazetteer([
+    "CrowdStrike Falcon", "Falcon platform", "Charlotte AI", "Microsoft Defender", "Microsoft Sentinel",
+    "Copilot for Security", "Security Copilot", "Microsoft Entra", "Azure Sentinel", "Prisma Cloud",
+    "Prisma Access", "Prisma SASE", "Cortex XSIAM", "Cortex XDR", "Cortex XSOAR", "Strata",
+    "Unit 42", "Singularity Platform", "Purple AI", "Insight Platform", "InsightVM", "InsightIDR",
+    "Varonis Data Security Platform", "Splunk", "Okta", "Zscaler", "SentinelOne", "Tenable",
+    "Qualys", "Wiz", "Proofpoint", "Mimecast", "CyberArk", "Darktrace", "Fortinet", "FortiGate",
+    "Cisco Umbrella", "Cisco Duo", "Duo Security", "KnowBe4", "Mandiant", "Rapid7", "Carbon Black",
+    "Cloudflare", "Akamai", "Netskope", "Abnormal Security", "Arctic Wolf", "Secureworks",
+    "ServiceNow Security Operations", "Google Security Operations", "Chronicle", "GitLab Ultimate",
+    "Modular Control Centre System",
+], flags=0)
+
+TECHNICAL_DETAILS = _gazetteer([
+    "command injection", "SQL injection", "cross-site scripting", "remote code execution",
+    "privilege escalation", "password spray", "password spraying", "credential stuffing",
+    "nation-state", "nation state actor", "Midnight Blizzard", "Nobelium", "Storm-0558",
+    "SolarWinds", "Log4j", "Log4Shell", "MOVEit", "zero-day", "zero day vulnerability",
+    "CVE", "IT/OT segmentation", "OT network", "air-gapped", "air gapped", "lateral movement",
+    "business email compromise", "supply chain attack", "threat actor gained access",
+    "ransomware attack", "ransomware incident",
+    "DDoS attack", "denial-of-service attack",
+])
+
+# Named roles / bodies: a security leader with stated credentials or a name,
+# or a specialized (non-audit) oversight committee
+ROLE = r"(?:Chief Information Security Officer|CISO|Chief Security Officer|CSO|Chief Information Officer|CIO|Chief Technology Officer|CTO|Chief Trust Officer)"
+NAMED_INDIVIDUALS = re.compile(
+    rf"{ROLE}[^.;]{{0,120}}?(?:\b\d+\+?\s+years|\bover\s+\w+\s+years|\b(?:CISSP|CISM|CISA|CRISC|GIAC|CEH)\b|"
+    rf"\bmaster'?s\b|\bph\.?d\b|\bdegree\b|formerly|previously served|prior to joining)"
+    rf"|{ROLE},?\s+(?:Mr\.|Ms\.|Mrs\.|Dr\.)?\s*[A-Z][a-z]+(?:\s[A-Z]\.)?\s[A-Z][a-z]+"
+    rf"|\b(?:[A-Z][a-z]+\s){{0,3}}(?:Cybersecurity|Cyber|Security|Technology|Information Security|Privacy|Digital)"
+    rf"(?:\s(?:and|&)\s[A-Z][a-z]+)?\s(?:Committee|Council|Steering Committee|Working Group|Board)\b"
+)
+
+CYBER_CONTEXT = re.compile(
+    r"\b(?:cyber\w*|security|phishing|threat\w*|incident\w*|breach\w*|attack\w*|malware|ransomware|"
+    r"vulnerabilit\w+|training|employees trained|alerts?|signals?)\b", re.I
+)
+QUANTITY = re.compile(
+    r"(?<![\w.])(?:\$\s?\d[\d,.]*\s*(?:million|billion|thousand)?|\d[\d,.]*\s*(?:%|percent|million|billion|"
+    r"trillion|thousand)|\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?\s+(?:employees|incidents|attacks|threats|"
+    r"signals|alerts|hours|vulnerabilities|phishing|tests|exercises|analysts|professionals))", re.I
+)
+
+PATTERNS = {
+    "frameworks":        FRAMEWORKS,
+    "specific_controls": SPECIFIC_CONTROLS,
+    "named_individuals": NAMED_INDIVIDUALS,
+    "product_names":     PRODUCT_NAMES,
+    "technical_details": TECHNICAL_DETAILS,
+}
+
+
+# =============================================================================
+# MATCHING
+# =============================================================================
+
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_SPLIT.split(text or "") if s and s.strip()]
+
+
+def is_active(sentence, start):
+    """False if a negation or conditional cue appears just before the match."""
+    window = sentence[max(0, start - CUE_WINDOW):start]
+    return not (NEGATION_CUES.search(window) or CONDITIONAL_CUES.search(window))
+
+
+def _quote(sentence):
+    s = " ".join(sentence.split())
+    return s if len(s) <= MAX_QUOTE_CHARS else s[:MAX_QUOTE_CHARS - 3] + "..."
+
+
+def find_evidence(sentences, pattern, context=None):
+    """Active, firm-specific sentences matching pattern (and context, if given)."""
+    evidence = []
+    for sentence in sentences:
+        if not FIRM_CUES.search(sentence):
+            continue
+        if context is not None and not context.search(sentence):
+            continue
+        for m in pattern.finditer(sentence):
+            if is_active(sentence, m.start()):
+                evidence.append(_quote(sentence))
+                break
+        if len(evidence) >= MAX_EVIDENCE:
+            break
+    return evidence
+
+
+def count_boilerplate(text):
+    """Boilerplate phrases present per section, matching the LLM's llm_boilerplate judgment."""
+    part_1a, _, part_1c = (text or "").partition(SECTION_MARKER)
+    counts = {}
+    for label, part in (("1A", part_1a), ("1C", part_1c)):
+        if part.strip():
+            normalized   = normalize(part)
+            counts[label] = [p for p in BOILERPLATE_PHRASES if normalize(p) in normalized]
+    return counts
+
+
+def score_filing_rules(text):
+    """Same output shape as content_scoring.score_filing, computed locally."""
+    if not text or len(text.strip()) < 100:
+        return None
+
+    sentences = split_sentences(text)
+    result    = {}
+    for cat, pattern in PATTERNS.items():
+        evidence    = find_evidence(sentences, pattern)
+        result[cat] = {"score": int(bool(evidence)), "rationale": " | ".join(evidence)}
+
+    evidence = find_evidence(sentences, QUANTITY, context=CYBER_CONTEXT)
+    result["quantitative_data"] = {"score": int(bool(evidence)), "rationale": " | ".join(evidence)}
+
+    boiler = count_boilerplate(text)
+    result["llm_boilerplate"] = {
+        "score":     sum(len(v) for v in boiler.values()),
+        "rationale": "; ".join(f"{sec}: {len(v)} ({', '.join(v)})" for sec, v in boiler.items()),
+    }
+    return result
+
+
+# =============================================================================
+# CORPUS RUN
+# =============================================================================
+
+def run_rule_based_scoring(data_dir=DATA_DIR, output_path=OUTPUT_PATH):
+    """Scores every txt filing locally and writes the content_scores schema to {output_path}.parquet."""
+    import pandas as pd
+    from content_scoring import (
+        load_filings_from_dir, _build_result, _save, ALL_CATEGORIES,
+    )
+
+    filings = load_filings_from_dir(data_dir)
+    results = [
+        _build_result(f["ticker"], f["year"], score_filing_rules(f["text"]))
+        for f in filings
+    ]
+    _save(pd.DataFrame(), results, output_path)
+
+    out = pd.read_parquet(f"{output_path}.parquet")
+    print(f"\n[INFO] Done. {len(out)} filings scored (rule-based).")
+    print("\n[SUMMARY] Mean scores:")
+    print(out[ALL_CATEGORIES + ["specificity_score"]].mean().round(3).to_string())
+    return out
+
+
+if __name__ == "__main__":
+    run_rule_based_scoring()
@@ -32,6 +32,8 @@ import seaborn as sns
 import numpy as np
 import os
 
+from metadata import read_excel_cached
+
 # ── PATHS ─────────────────────────────────────────────────────────────────────
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "..", "visuals", "specificity")
@@ -41,7 +43,7 @@ def out(filename):
     return os.path.join(OUTPUT_DIR, filename)
 
 # ── LOAD & MERGE ──────────────────────────────────────────────────────────────
-content = pd.read_excel(os.path.join(SCRIPT_DIR, "..", "results", "content_scores.xlsx"))
+content = read_excel_cached(os.path.join(SCRIPT_DIR, "..", "results", "content_scores.xlsx"))
 boiler  = pd.read_csv(os.path.join(SCRIPT_DIR, "..", "results", "boilerplate_results.csv"))
 length  = pd.read_csv(os.path.join(SCRIPT_DIR, "..", "results", "length_results.csv"))[
     ["ticker", "year", "sector", "size", "has_1c"]
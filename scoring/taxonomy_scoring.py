@@ -2,19 +2,38 @@
 NIST CSF 2.0 Cybersecurity Disclosure Scoring Pipeline
 =======================================================
 Computes per-filing:
-  - Keyword counts k_f per NIST CSF function
+  - Keyword counts k_f per NIST CSF function (raw: every keyword counted
+    independently), plus deduplicated counts kd_f (leftmost-longest,
+    non-overlapping; shared keywords attributed by SHARED_POLICY)
   - Frequency weights w_f = k_f / sum(k_j)
   - Focus vector v in R^6
   - Balance Score B = 1 / sqrt(6 * sum(w_f^2))
   - Primary function (dominant thematic focus)
 
-Dependencies: pip install pyarrow pandas openpyxl
+Outputs (parquet, typed):  <stem>.parquet                 all scores
+                           <stem>_focus_vectors.parquet   w_f, B, primary function
+                           <stem>_summary.parquet         describe() of w_f, B, hits
+Excel / CSV only on request: python taxonomy_scoring.py export [<stem>]
+
+Dependencies: pip install pyarrow pandas (openpyxl only for export)
 """
 
+import os
 import re
+import sys
 import math
+import multiprocessing as mp
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+from keyword_matcher import load_automaton, TokenMatcher
+from token_cache import SECTION_MARKER, PARAGRAPH_RE
 
 # =============================================================================
 # NIST CSF 2.0 KEYWORD DICTIONARY (~100-150 keywords per function)
@@ -198,6 +217,13 @@ NIST_KEYWORDS = {
 
 FUNCTIONS = ["GV", "ID", "PR", "DE", "RS", "RC"]
 
+# Keywords listed under several functions: "split" | "first" | "all" (see keyword_matcher.py)
+SHARED_POLICY = "split"
+
+# Token normalizer for the deduplicated / batch matchers: None | "porter" |
+# "snowball" | "wordnet" (see keyword_matcher.py). Raw k_f are never stemmed.
+NORMALIZER = None
+
 # =============================================================================
 # CORE FUNCTIONS
 # =============================================================================
@@ -210,6 +236,7 @@ def preprocess(text: str) -> str:
 
 
 def count_keywords(text: str, keywords: list) -> int:
+    """Reference per-keyword count; compute_weights uses the automaton, which gives identical k_f."""
     count = 0
     for kw in keywords:
         if ' ' in kw:
@@ -219,14 +246,51 @@ def count_keywords(text: str, keywords: list) -> int:
     return count
 
 
-def compute_weights(text: str) -> tuple:
+_automaton        = None
+_token_matcher    = None
+_weight_matrices  = {}      # (dedup, policy) -> pattern x function weights of the current matchers
+
+
+def get_automaton():
+    """NIST_KEYWORDS compiled once per process (and cached on disk across runs)."""
+    global _automaton
+    if _automaton is None:
+        _automaton = load_automaton({f: NIST_KEYWORDS[f] for f in FUNCTIONS})
+    return _automaton
+
+
+def get_token_matcher():
+    global _token_matcher
+    if _token_matcher is None or _token_matcher.normalizer != NORMALIZER:
+        _token_matcher = TokenMatcher({f: NIST_KEYWORDS[f] for f in FUNCTIONS}, NORMALIZER)
+        _weight_matrices.clear()
+    return _token_matcher
+
+
+def set_normalizer(name):
+    """Switches the token matchers to another normalizer (rebuilt on next use)."""
+    global NORMALIZER
+    NORMALIZER = name
+
+
+def count_functions(text: str, policy: str = SHARED_POLICY) -> tuple:
+    """(raw, dedup) keyword counts per function for one filing."""
+    processed = preprocess(text)
+    return get_automaton().count(processed), get_token_matcher().count(processed, policy)
+
+
+def compute_weights(text: str, dedup: bool = False, policy: str = SHARED_POLICY) -> tuple:
     """
     Returns (weights, counts).
-      counts[f]  = raw keyword hits for function f  (k_f)
+      counts[f]  = raw keyword hits for function f  (k_f), or the
+                   deduplicated hits (kd_f) if dedup
       weights[f] = w_f = k_f / sum(k_j)
     """
     processed = preprocess(text)
-    counts    = {f: count_keywords(processed, NIST_KEYWORDS[f]) for f in FUNCTIONS}
+    if dedup:
+        counts = get_token_matcher().count(processed, policy)
+    else:
+        counts = get_automaton().count(processed)
     total     = sum(counts.values())
     weights   = {f: counts[f] / total if total > 0 else 0.0 for f in FUNCTIONS}
     return weights, counts
@@ -243,40 +307,324 @@ def compute_balance_score(weights: dict) -> float:
 
 
 # =============================================================================
-# PIPELINE
+# SECTION / PARAGRAPH LEVEL
 # =============================================================================
 
-def run_pipeline(
-    parquet_path: str,
-    text_col:     str = "combined_text",
-    firm_col:     str = "company_name",
-    output_path:  str = "nist_csf_scores.xlsx",
-):
-    print("=" * 60)
-    print("NIST CSF 2.0 Cybersecurity Disclosure Scoring")
-    print("=" * 60)
+def _map_offsets(points, runs):
+    """
+    Maps offsets in the lowered, hyphen-normalised text to offsets in
+    preprocess() output, where every whitespace run became one space.
+    A point inside a run maps to just after that run's single space.
+    """
+    if not runs:
+        return points
+    run_start = np.array([a for a, _ in runs])
+    run_end   = np.array([b for _, b in runs])
+    removed   = np.cumsum(run_end - run_start - 1)        # chars dropped up to and including run k
+    before    = removed - (run_end - run_start - 1)       # ... strictly before run k
+
+    out = points.copy()
+    k   = np.searchsorted(run_start, points, side="right") - 1
+    has = k >= 0
+    kk, p  = k[has], points[has]
+    inside = p < run_end[kk]
+    out[has] = np.where(inside, run_start[kk] - before[kk] + np.minimum(p - run_start[kk], 1), p - removed[kk])
+    return out
+
+
+def preprocess_with_offsets(text: str) -> tuple:
+    """
+    (processed, paragraph_starts, start_1c): preprocess(text) plus the
+    offsets, in the processed string, where each paragraph and Item 1C
+    begin (start_1c is None without a 1C section). Paragraph breaks are
+    found before whitespace is collapsed, so one pass serves all levels.
+    """
+    lowered   = re.sub(r'[-]', ' ', str(text).lower())
+    runs      = [m.span() for m in re.finditer(r'\s+', lowered)]
+    processed = re.sub(r'\s+', ' ', lowered)
 
-    # Load
-    print(f"\n[1/4] Loading {parquet_path}")
-    df = pd.read_parquet(parquet_path)
-    print(f"      Shape   : {df.shape}")
-    print(f"      Columns : {df.columns.tolist()}")
+    starts = [0] + [m.end() for m in PARAGRAPH_RE.finditer(lowered)]
+    marker = lowered.find(SECTION_MARKER.lower().replace("-", " "))
+    points = _map_offsets(np.array(starts + ([marker] if marker != -1 else []), dtype=np.int64), runs)
 
-    # Composite firm+year label so each filing is uniquely identified
-    if "year" in df.columns:
-        df["_firm_year"] = df[firm_col].astype(str) + " (" + df["year"].astype(str) + ")"
-        id_col = "_firm_year"
-    else:
-        id_col = firm_col
+    paragraph_starts = np.unique(points[:len(starts)])
+    return processed, paragraph_starts, (int(points[-1]) if marker != -1 else None)
+
+
+def match_spans(processed: str, dedup: bool = False, policy: str = SHARED_POLICY) -> tuple:
+    """
+    (starts, ends, pids, K) for every keyword hit in processed text: its
+    character span, the matcher's pattern id, and a hits x 6 matrix of what
+    each hit adds to k_f (raw automaton matches, or deduplicated token
+    matches attributed under policy).
+    """
+    key = (dedup, policy if dedup else None)
+    if key not in _weight_matrices:
+        _weight_matrices[key] = (get_token_matcher().weight_matrix(policy) if dedup
+                                 else get_automaton().weight_matrix())
+    matcher = get_token_matcher() if dedup else get_automaton()
+    spans   = list(matcher.iter_matches(processed))
+    starts  = np.array([s for s, _, _ in spans], dtype=np.int64)
+    ends    = np.array([e for _, e, _ in spans], dtype=np.int64)
+    pids    = np.array([p for _, _, p in spans], dtype=np.int64)
+    return starts, ends, pids, _weight_matrices[key][pids]
+
+
+def granular_scores(processed, paragraph_starts, start_1c, starts, K) -> pd.DataFrame:
+    """
+    Long-format rows for one filing: one per section (1A, 1C) and one per
+    paragraph, each with k_f, w_f, balance score and primary function.
+    Paragraph rows carry their section, so any grouping can be re-derived
+    at query time by summing k_f.
+    """
+    para  = np.searchsorted(paragraph_starts, starts, side="right") - 1
+    k_par = np.zeros((len(paragraph_starts), len(FUNCTIONS)))
+    np.add.at(k_par, para, K)
+
+    in_1c    = (paragraph_starts >= start_1c) if start_1c is not None else np.zeros(len(paragraph_starts), bool)
+    sections = np.where(in_1c, "1C", "1A")
+    ends     = np.append(paragraph_starts[1:], len(processed))
+
+    k_sec = np.array([k_par[sections == sec].sum(axis=0) for sec in ("1A", "1C")])
+    long  = pd.concat([
+        pd.DataFrame({"level": "section", "section": ["1A", "1C"], "paragraph": -1,
+                      "n_chars": [int((ends - paragraph_starts)[sections == sec].sum()) for sec in ("1A", "1C")]}),
+        pd.DataFrame({"level": "paragraph", "section": sections, "paragraph": np.arange(len(paragraph_starts)),
+                      "n_chars": ends - paragraph_starts}),
+    ], ignore_index=True)
+
+    k = np.vstack([k_sec, k_par])
+    weights, balance, primary = score_counts(k)
+    long["total_keyword_hits"] = k.sum(axis=1).round(4)
+    long["balance_score"]      = balance.round(4)
+    long["primary_function"]   = primary
+    for j, f in enumerate(FUNCTIONS):
+        long[f"w_{f}"] = weights[:, j].round(4)
+    for j, f in enumerate(FUNCTIONS):
+        long[f"k_{f}"] = k[:, j].round(4)
+    return long
+
+
+# =============================================================================
+# KEYWORD EVIDENCE
+# =============================================================================
+
+EVIDENCE_CONTEXT = 80   # characters of context kept on each side of a hit
+EVIDENCE_SCHEMA  = pa.schema([
+    ("firm_year", pa.string()),
+    ("ticker",    pa.string()),
+    ("year",      pa.int32()),
+    ("function",  pa.string()),
+    ("keyword",   pa.string()),
+    ("weight",    pa.float32()),   # share of the hit credited to function (< 1 only under split)
+    ("start",     pa.int32()),     # offsets into preprocess(text)
+    ("end",       pa.int32()),
+    ("context",   pa.string()),
+])
+EVIDENCE_DICT_COLUMNS = ["firm_year", "ticker", "function", "keyword"]
+EVIDENCE_ROW_GROUP    = 16_384   # rows stay in filing order, so small groups let firm_year filters skip most of the file
+
+
+def evidence_frame(firm_year, ticker, year, processed, starts, ends, pids, K, dedup=False) -> pd.DataFrame:
+    """One row per (hit, function) it counts towards, with a context window around the hit."""
+    hit, func = np.nonzero(K)
+    matcher   = get_token_matcher() if dedup else get_automaton()
+    keywords  = [" ".join(p) if dedup else p for p in matcher.patterns]
+    return pd.DataFrame({
+        "firm_year": firm_year,
+        "ticker":    ticker,
+        "year":      pd.array([int(year)] * len(hit) if str(year).strip() else [None] * len(hit), dtype="Int32"),
+        "function":  np.array(FUNCTIONS)[func],
+        "keyword":   [keywords[p] for p in pids[hit]],
+        "weight":    K[hit, func].astype(np.float32),
+        "start":     starts[hit].astype(np.int32),
+        "end":       ends[hit].astype(np.int32),
+        "context":   [processed[max(0, a - EVIDENCE_CONTEXT):b + EVIDENCE_CONTEXT]
+                      for a, b in zip(starts[hit], ends[hit])],
+    })
+
+
+def open_evidence_writer(path):
+    """zstd parquet writer with dictionary-encoded id / function / keyword columns."""
+    return pq.ParquetWriter(path, EVIDENCE_SCHEMA, compression="zstd", use_dictionary=EVIDENCE_DICT_COLUMNS)
+
+
+def write_evidence(writer, evidence):
+    if evidence is not None and len(evidence):
+        writer.write_table(pa.Table.from_pandas(evidence, schema=EVIDENCE_SCHEMA, preserve_index=False),
+                           row_group_size=EVIDENCE_ROW_GROUP)
+
+
+def load_evidence(path, firm_year=None, keyword=None, function=None, ticker=None, columns=None) -> pd.DataFrame:
+    """
+    Evidence rows matching every given filter (a value or a list of
+    values each). Filters are pushed down to the parquet reader, so only
+    matching row groups / rows are materialised.
+    """
+    filters = []
+    for col, value in (("firm_year", firm_year), ("keyword", keyword), ("function", function), ("ticker", ticker)):
+        if value is None:
+            continue
+        filters.append((col, "in", list(value)) if isinstance(value, (list, tuple, set)) else (col, "==", value))
+    return pd.read_parquet(path, columns=columns, filters=filters or None)
+
+
+# =============================================================================
+# BATCH (whole corpus at once)
+# =============================================================================
+
+def keyword_incidence():
+    """
+    (vocabulary, incidence): the distinct normalised keywords and a sparse
+    V x 6 matrix with incidence[v, f] = 1 if keyword v is listed under f.
+    Listings that reduce to the same tokens ("third-party risk" / "third
+    party risk", or inflections under a normalizer) are one pattern and
+    count once per hit.
+    """
+    matcher = get_token_matcher()
+    vocab   = [" ".join(p) for p in matcher.patterns]
+    return vocab, sparse.csr_matrix(matcher.weight_matrix("all"))
+
+
+def count_matrix(texts, vocab):
+    """
+    N x V sparse keyword counts. Equivalent to CountVectorizer's word
+    n-gram analyzer restricted to vocab, with the n-grams produced by the
+    keyword trie instead of enumerating every n-gram of every filing.
+    """
+    matcher    = get_token_matcher()
+    vectorizer = CountVectorizer(vocabulary=vocab, analyzer=lambda doc: matcher.all_ngrams(preprocess(doc)))
+    return vectorizer.transform(texts)
+
+
+def score_counts(counts):
+    """Vectorized w_f, B and primary function for an N x 6 array of k_f."""
+    counts  = np.asarray(counts, dtype=float)
+    total   = counts.sum(axis=1, keepdims=True)
+    weights = np.divide(counts, total, out=np.zeros_like(counts), where=total > 0)
+    sum_sq  = (weights ** 2).sum(axis=1)
+    balance = np.divide(1.0, np.sqrt(6 * sum_sq), out=np.zeros_like(sum_sq), where=sum_sq > 0)
+    primary = np.where(total[:, 0] > 0, np.array(FUNCTIONS)[weights.argmax(axis=1)], "N/A")
+    return weights, balance, primary
+
+
+def score_corpus(texts) -> pd.DataFrame:
+    """
+    k_f, w_f, balance and primary function for every filing in one call:
+    one sparse document-term matrix times the keyword -> function incidence.
+    Counts are token n-gram counts (overlapping keywords all count), not
+    the raw substring counts of count_keywords: on the 163-filing sample
+    k_ID is ~0.90x and k_RC ~0.91x raw, and 17 instead of 29 filings pass
+    B >= 0.6. Runs label their rows with count_method so the two are never
+    mixed up.
+    """
+    vocab, incidence = keyword_incidence()
+    k = np.asarray((count_matrix(texts, vocab) @ incidence).todense()).round().astype(int)
+    weights, balance, primary = score_counts(k)
+
+    out = pd.DataFrame({
+        "total_keyword_hits": k.sum(axis=1),
+        "balance_score":      balance.round(4),
+        "balance_sufficient": balance >= 0.6,
+        "primary_function":   primary,
+    })
+    for j, f in enumerate(FUNCTIONS):
+        out[f"w_{f}"] = weights[:, j].round(4)
+        out[f"k_{f}"] = k[:, j]
+    return out
+
+
+# =============================================================================
+# OUTPUTS
+# =============================================================================
+
+OUTPUT_STEM = "nist_csf_scores"
+
+FOCUS_COLS = (
+    ["firm_year", "ticker", "company_name", "sector", "year", "count_method"]
+    + [f"w_{f}" for f in FUNCTIONS]
+    + ["balance_score", "balance_sufficient", "primary_function"]
+)
+STAT_COLS = [f"w_{f}" for f in FUNCTIONS] + ["balance_score", "total_keyword_hits"]
+
+
+def output_stem(path: str) -> str:
+    """Output prefix; a legacy .xlsx / .csv / .parquet name is accepted and its extension dropped."""
+    root, ext = os.path.splitext(path)
+    return root if ext.lower() in (".xlsx", ".csv", ".parquet") else path
+
+
+def write_views(results: pd.DataFrame, stem: str) -> list:
+    """Focus_Vectors and Summary_Stats as small parquet files; returns the paths written."""
+    focus   = results[[c for c in FOCUS_COLS if c in results.columns]]
+    summary = results[STAT_COLS].describe().round(4).rename_axis("stat").reset_index()
+    summary.insert(1, "count_method", results["count_method"].iloc[0] if len(results) else None)
+    focus.to_parquet(f"{stem}_focus_vectors.parquet", index=False)
+    summary.to_parquet(f"{stem}_summary.parquet", index=False)
+    return [f"{stem}_focus_vectors.parquet", f"{stem}_summary.parquet"]
+
+
+def export_tables(stem: str = OUTPUT_STEM, excel: bool = True, csv: bool = True) -> list:
+    """
+    On-demand export of the parquet outputs to the old formats: a
+    three-sheet <stem>.xlsx (Scores, Focus_Vectors, Summary_Stats) and
+    <stem>.csv. Returns the paths written.
+    """
+    stem    = output_stem(stem)
+    results = pd.read_parquet(f"{stem}.parquet")
+    written = []
+    if excel:
+        focus   = pd.read_parquet(f"{stem}_focus_vectors.parquet")
+        summary = pd.read_parquet(f"{stem}_summary.parquet").set_index("stat")
+        with pd.ExcelWriter(f"{stem}.xlsx", engine="openpyxl") as writer:
+            results.to_excel(writer, sheet_name="Scores", index=False)
+            focus.to_excel(writer, sheet_name="Focus_Vectors", index=False)
+            summary.rename_axis(None).to_excel(writer, sheet_name="Summary_Stats")
+        written.append(f"{stem}.xlsx")
+    if csv:
+        results.to_csv(f"{stem}.csv", index=False)
+        written.append(f"{stem}.csv")
+    for path in written:
+        print(f"  Saved : {path}")
+    return written
 
-    df = df.dropna(subset=[text_col]).reset_index(drop=True)
-    print(f"      Filings : {len(df)}")
 
-    # Score each filing
-    print(f"\n[2/4] Scoring filings...")
-    rows = []
+# =============================================================================
+# PIPELINE
+# =============================================================================
+
+def _score_rows(df, text_col, id_col, dedup, policy, granular=False, evidence=False):
+    """
+    One row per filing, scored one at a time (raw and deduplicated counts).
+    Returns (rows, granular rows, evidence rows); the last two are None
+    unless requested, and are derived from the same keyword matches as the
+    filing-level counts.
+    """
+    rows, long_parts, evidence_parts = [], [], []
     for _, filing in df.iterrows():
-        weights, counts = compute_weights(filing[text_col])
+        if granular or evidence:
+            processed, paragraph_starts, start_1c = preprocess_with_offsets(filing[text_col])
+            raw_spans = match_spans(processed)
+            dd_spans  = match_spans(processed, dedup=True, policy=policy)
+            raw       = dict(zip(FUNCTIONS, raw_spans[3].sum(axis=0).round().astype(int).tolist()))
+            deduped   = dict(zip(FUNCTIONS, dd_spans[3].sum(axis=0).tolist()))
+            starts, ends, pids, K = dd_spans if dedup else raw_spans
+            if granular:
+                long = granular_scores(processed, paragraph_starts, start_1c, starts, K)
+                long.insert(0, "firm_year", filing[id_col])
+                long.insert(1, "ticker",    filing.get("ticker", ""))
+                long.insert(2, "year",      filing.get("year",   ""))
+                long_parts.append(long)
+            if evidence:
+                evidence_parts.append(evidence_frame(
+                    filing[id_col], filing.get("ticker", ""), filing.get("year", ""),
+                    processed, starts, ends, pids, K, dedup,
+                ))
+        else:
+            raw, deduped = count_functions(filing[text_col], policy)
+        counts          = deduped if dedup else raw
+        total           = sum(counts.values())
+        weights         = {f: counts[f] / total if total > 0 else 0.0 for f in FUNCTIONS}
         balance         = compute_balance_score(weights)
         primary         = max(weights, key=weights.get) if any(weights.values()) else "N/A"
 
@@ -287,51 +635,208 @@ def run_pipeline(
             "sector":             filing.get("sector",       ""),
             "year":               filing.get("year",         ""),
             "has_1c":             filing.get("has_1c",       ""),
-            "total_keyword_hits": sum(counts.values()),
+            "total_keyword_hits": sum(raw.values()),
+            "total_keyword_hits_dedup": round(sum(deduped.values()), 4),
             "balance_score":      round(balance, 4),
             "balance_sufficient": balance >= 0.6,
             "primary_function":   primary,
         }
         for f in FUNCTIONS:
             row[f"w_{f}"] = round(weights[f], 4)
-            row[f"k_{f}"] = counts[f]
+            row[f"k_{f}"] = raw[f]
+            row[f"kd_{f}"] = round(deduped[f], 4)
 
         rows.append(row)
 
-    results = pd.DataFrame(rows)
+    long     = pd.concat(long_parts, ignore_index=True) if granular and long_parts else None
+    evidence = pd.concat(evidence_parts, ignore_index=True) if evidence and evidence_parts else None
+    return rows, long, evidence
+
+
+def _score_frame(df, text_col, firm_col, dedup, policy, batch, granular=False, evidence=False):
+    """
+    Scores the filings in df (rows without text dropped) into the output
+    columns, in row order. Returns (results, granular rows, evidence rows),
+    the last two None unless requested.
+    """
+    # Composite firm+year label so each filing is uniquely identified
+    if "year" in df.columns:
+        df["_firm_year"] = df[firm_col].astype(str) + " (" + df["year"].astype(str) + ")"
+        id_col = "_firm_year"
+    else:
+        id_col = firm_col
+
+    df = df.dropna(subset=[text_col]).reset_index(drop=True)
+
+    if batch:
+        meta    = pd.DataFrame({
+            "firm_year":    df[id_col],
+            "ticker":       df.get("ticker",       ""),
+            "company_name": df.get("company_name", ""),
+            "sector":       df.get("sector",       ""),
+            "year":         df.get("year",         ""),
+            "has_1c":       df.get("has_1c",       ""),
+        })
+        results = pd.concat([meta, score_corpus(df[text_col])], axis=1)
+        long = found = None
+    else:
+        rows, long, found = _score_rows(df, text_col, id_col, dedup, policy, granular, evidence)
+        results = pd.DataFrame(rows)
+
+    # k_f / w_f / B mean different things per method: "raw", "dedup" or "batch"
+    results["count_method"] = "batch" if batch else "dedup" if dedup else "raw"
 
     # Enforce column order
     col_order = (
-        ["firm_year", "ticker", "company_name", "sector", "year", "has_1c",
-         "total_keyword_hits", "balance_score", "balance_sufficient", "primary_function"]
+        ["firm_year", "ticker", "company_name", "sector", "year", "has_1c", "count_method",
+         "total_keyword_hits", "total_keyword_hits_dedup",
+         "balance_score", "balance_sufficient", "primary_function"]
         + [f"w_{f}" for f in FUNCTIONS]
         + [f"k_{f}" for f in FUNCTIONS]
+        + [f"kd_{f}" for f in FUNCTIONS]
     )
     results = results[[c for c in col_order if c in results.columns]]
+    return results, long, found
 
-    # Save
-    print(f"\n[3/4] Saving to {output_path}")
-    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
 
-        # All scores
-        results.to_excel(writer, sheet_name="Scores", index=False)
+def _score_batch(table, text_col, firm_col, dedup, policy, batch, granular, evidence, normalizer=None):
+    """
+    Worker entry point: one pyarrow record batch in, scored DataFrames out.
+    normalizer is passed explicitly because spawned workers (no fork, e.g.
+    on Windows) re-import this module with the default NORMALIZER.
+    """
+    set_normalizer(normalizer)
+    return _score_frame(table.to_pandas(), text_col, firm_col, dedup, policy, batch, granular, evidence)
+
+
+def _score_parallel(parquet_path, text_col, firm_col, dedup, policy, batch, granular,
+                    workers, batch_size, scores_path, evidence_writer=None, normalizer=None):
+    """
+    Streams record batches of the input to a process pool and writes scored
+    rows to scores_path (and evidence rows to evidence_writer, if given) as
+    they come back, in input order. The matchers are built before the
+    pool forks, so workers share them copy-on-write.
+    """
+    pf      = pq.ParquetFile(parquet_path)
+    wanted  = {text_col, firm_col, "ticker", "company_name", "sector", "year", "has_1c"}
+    columns = [c for c in pf.schema_arrow.names if c in wanted]
+    print(f"\n[1/4] Streaming {parquet_path}")
+    print(f"      Rows    : {pf.metadata.num_rows} in batches of {batch_size}")
+    print(f"      Columns : {columns}")
+
+    get_automaton()
+    get_token_matcher()
+    context = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+
+    print(f"\n[2/4] Scoring filings on {workers} processes{' (batch)' if batch else ''}...")
+    parts, long_parts, pending, writer = [], [], deque(), None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        def drain(n):
+            nonlocal writer
+            while len(pending) > n:
+                part, long, found = pending.popleft().result()
+                if part.empty:
+                    continue        # no filing in this batch had text
+                table = pa.Table.from_pandas(part, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(scores_path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+                parts.append(part)
+                if long is not None:
+                    long_parts.append(long)
+                if evidence_writer is not None:
+                    write_evidence(evidence_writer, found)
+
+        for record_batch in pf.iter_batches(batch_size=batch_size, columns=columns):
+            pending.append(executor.submit(_score_batch, record_batch, text_col, firm_col, dedup, policy, batch,
+                                           granular, evidence_writer is not None, normalizer))
+            drain(workers * 2)      # bounded read-ahead; results leave in submission order
+        drain(0)
+    if writer is not None:
+        writer.close()
+
+    results = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    long    = pd.concat(long_parts, ignore_index=True) if long_parts else None
+    print(f"      Filings : {len(results)}")
+    return results, long
+
+
+def run_pipeline(
+    parquet_path: str,
+    text_col:     str = "combined_text",
+    firm_col:     str = "company_name",
+    output_path:  str = OUTPUT_STEM,
+    dedup:        bool = False,
+    policy:       str = SHARED_POLICY,
+    batch:        bool = False,
+    workers:      int = 1,
+    batch_size:   int = 64,
+    granular:     bool = False,
+    evidence:     bool = False,
+    normalizer:   str = None,
+):
+    """
+    Scores every filing. Both raw (k_f) and deduplicated (kd_f) counts are
+    reported; dedup chooses which of the two the weights, balance score and
+    primary function are computed from. batch scores the whole corpus with
+    score_corpus instead (n-gram k_f only, no kd_f). The count_method column
+    ("raw" / "dedup" / "batch") records which of these the row holds.
+    workers > 1 streams the
+    input in record batches of batch_size through a process pool (see
+    _score_parallel); row order matches the serial run. granular also
+    writes section- and paragraph-level focus vectors as a long table to
+    <output>_granular.parquet. evidence writes one row per keyword hit
+    (filing, function, keyword, offsets, context) to <output>_evidence.parquet;
+    query it with load_evidence. normalizer (e.g. "porter") stems keywords
+    and text for the deduplicated / batch counts; None keeps the current
+    NORMALIZER.
+    """
+    if batch and (dedup or granular or evidence):
+        raise ValueError("batch mode computes filing-level n-gram counts only; "
+                         "use dedup=False, granular=False, evidence=False")
+
+    if normalizer is not None:
+        set_normalizer(normalizer)
+    get_token_matcher()     # built here, before any worker processes fork
+
+    stem            = output_stem(output_path)
+    evidence_path   = f"{stem}_evidence.parquet"
+    evidence_writer = open_evidence_writer(evidence_path) if evidence else None
 
-        # Focus vectors only — clean table ready for the paper
-        focus_cols = (
-            ["firm_year", "ticker", "company_name", "sector", "year"]
-            + [f"w_{f}" for f in FUNCTIONS]
-            + ["balance_score", "balance_sufficient", "primary_function"]
-        )
-        results[[c for c in focus_cols if c in results.columns]].to_excel(
-            writer, sheet_name="Focus_Vectors", index=False
-        )
+    print("=" * 60)
+    print("NIST CSF 2.0 Cybersecurity Disclosure Scoring")
+    print("=" * 60)
+
+    if workers > 1:
+        results, long = _score_parallel(parquet_path, text_col, firm_col, dedup, policy, batch, granular,
+                                        workers, batch_size, f"{stem}.parquet", evidence_writer, NORMALIZER)
+    else:
+        # Load
+        print(f"\n[1/4] Loading {parquet_path}")
+        df = pd.read_parquet(parquet_path)
+        print(f"      Shape   : {df.shape}")
+        print(f"      Columns : {df.columns.tolist()}")
+        print(f"      Filings : {df[text_col].notna().sum()}")
+
+        # Score each filing
+        print(f"\n[2/4] Scoring filings{' (batch)' if batch else ''}...")
+        results, long, found = _score_frame(df, text_col, firm_col, dedup, policy, batch, granular, evidence)
+        if evidence_writer is not None:
+            write_evidence(evidence_writer, found)
+
+    # Save
+    print(f"\n[3/4] Saving to {stem}*.parquet")
+    if workers <= 1:
+        results.to_parquet(f"{stem}.parquet", index=False)   # the parallel path streams it batch by batch
+    saved = [f"{stem}.parquet"] + write_views(results, stem)
 
-        # Summary statistics across all filings
-        stat_cols = [f"w_{f}" for f in FUNCTIONS] + ["balance_score", "total_keyword_hits"]
-        results[stat_cols].describe().round(4).to_excel(writer, sheet_name="Summary_Stats")
+    if long is not None:
+        long.to_parquet(f"{stem}_granular.parquet", index=False)
+        saved.append(f"{stem}_granular.parquet")
 
-    csv_path = output_path.replace(".xlsx", ".csv")
-    results.to_csv(csv_path, index=False)
+    if evidence_writer is not None:
+        evidence_writer.close()
+        saved.append(evidence_path)
 
     # Console summary
     print(f"\n[4/4] Done\n")
@@ -343,8 +848,9 @@ def run_pipeline(
 
     n_ok = results["balance_sufficient"].sum()
     print(f"\n  Balance >= 0.6 : {n_ok}/{len(results)} filings pass threshold")
-    print(f"\n  Saved : {output_path}")
-    print(f"  Saved : {csv_path}")
+    print()
+    for path in saved:
+        print(f"  Saved : {path}")
 
     return results
 
@@ -357,7 +863,12 @@ if __name__ == "__main__":
     PARQUET_PATH = "filings.parquet"
     TEXT_COL     = "combined_text"
     FIRM_COL     = "company_name"
-    OUTPUT_PATH  = "nist_csf_scores.xlsx"
+    OUTPUT_PATH  = OUTPUT_STEM
+
+    # python taxonomy_scoring.py export [stem]  — Excel / CSV from existing parquet outputs
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        export_tables(sys.argv[2] if len(sys.argv) > 2 else OUTPUT_PATH)
+        sys.exit(0)
 
     results = run_pipeline(
         parquet_path=PARQUET_PATH,
@@ -0,0 +1,211 @@
+"""
+Integer-Encoded Token Cache
+===========================
+Tokenizes every filing once and stores it as int32 token ids, so phrase /
+n-gram matching (boilerplate_detector.py, token_cache_dir=...) runs over
+numpy arrays instead of re-scanning combined_text.
+
+This module also holds the text conventions every scorer shares: the Item
+1C marker, the \\w+ token rule, and the sentence and paragraph boundaries.
+The boundary patterns are plain strings as well, so pyarrow.compute (RE2,
+no lookaround) can use them in length_analysis.py.
+
+On-disk layout (CACHE_DIR/):
+  tokens.bin    – all filings' token ids back to back (raw int32, memory-mapped)
+  index.npz     – per-filing token offsets, 1C split point, sentence and
+                  paragraph start positions (CSR-style: *_starts + *_offsets)
+  vocab.json    – id -> token list
+  keys.parquet  – ticker / year per filing, aligned with the index
+
+Tokens are lowercase \\w+ runs, so hyphenated terms split ("zero-trust" ->
+"zero", "trust"), matching preprocess() in taxonomy_scoring.py.
+"""
+
+import os
+import re
+import json
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+PARQUET_PATH = "filings.parquet"
+CACHE_DIR    = "token_cache"
+BATCH_ROWS   = 256
+
+SECTION_MARKER  = "--- ITEM 1C ---"
+SENTENCE_END    = r"[.!?]+(\s|$)"       # terminal punctuation run, then whitespace or end
+PARAGRAPH_SEP   = r"\n\s*\n"            # blank line
+TOKEN_RE        = re.compile(r"\w+")
+SENTENCE_END_RE = re.compile(SENTENCE_END)
+PARAGRAPH_RE    = re.compile(PARAGRAPH_SEP)
+
+
+# =============================================================================
+# BUILD
+# =============================================================================
+
+def tokenize(text, vocab):
+    """
+    Encodes one filing. Returns (ids, split_1c, sentence_starts, paragraph_starts),
+    where split_1c is the index of the first 1C token (-1 if there is no 1C
+    section) and the *_starts arrays hold token indices where a unit begins.
+    New tokens are appended to vocab (dict token -> id) in place.
+    """
+    text    = text or ""
+    lowered = text.lower()
+
+    starts, ids = [], []
+    for m in TOKEN_RE.finditer(lowered):
+        starts.append(m.start())
+        ids.append(vocab.setdefault(m.group(), len(vocab)))
+    starts = np.asarray(starts, dtype=np.int64)
+    ids    = np.asarray(ids, dtype=np.int32)
+
+    marker   = text.find(SECTION_MARKER)
+    split_1c = int(np.searchsorted(starts, marker + len(SECTION_MARKER))) if marker != -1 else -1
+
+    def unit_starts(pattern):
+        ends = [m.end() for m in pattern.finditer(text)]
+        pos  = np.searchsorted(starts, ends) if ends else np.empty(0, dtype=np.int64)
+        pos  = np.unique(np.concatenate([[0], pos]))
+        return pos[pos < max(len(ids), 1)].astype(np.int32)
+
+    return ids, split_1c, unit_starts(SENTENCE_END_RE), unit_starts(PARAGRAPH_RE)
+
+
+def build_token_cache(parquet_path=PARQUET_PATH, cache_dir=CACHE_DIR, text_col="combined_text"):
+    """
+    Streams the filings parquet in record batches, encodes each filing and
+    appends its ids to tokens.bin, so memory stays bounded by one batch.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    vocab = {}
+    keys, offsets, split_1c = [], [0], []
+    sent_starts, sent_offsets = [], [0]
+    para_starts, para_offsets = [], [0]
+
+    source = pq.ParquetFile(parquet_path)
+    with open(os.path.join(cache_dir, "tokens.bin"), "wb") as f:
+        for batch in source.iter_batches(batch_size=BATCH_ROWS, columns=["ticker", "year", text_col]):
+            for ticker, year, text in zip(*(batch.column(c).to_pylist() for c in ("ticker", "year", text_col))):
+                ids, split, sents, paras = tokenize(text, vocab)
+                ids.tofile(f)
+
+                keys.append((ticker, year))
+                offsets.append(offsets[-1] + len(ids))
+                split_1c.append(split)
+                sent_starts.append(sents)
+                sent_offsets.append(sent_offsets[-1] + len(sents))
+                para_starts.append(paras)
+                para_offsets.append(para_offsets[-1] + len(paras))
+
+    np.savez(
+        os.path.join(cache_dir, "index.npz"),
+        offsets=np.asarray(offsets, dtype=np.int64),
+        split_1c=np.asarray(split_1c, dtype=np.int32),
+        sent_starts=np.concatenate(sent_starts) if sent_starts else np.empty(0, np.int32),
+        sent_offsets=np.asarray(sent_offsets, dtype=np.int64),
+        para_starts=np.concatenate(para_starts) if para_starts else np.empty(0, np.int32),
+        para_offsets=np.asarray(para_offsets, dtype=np.int64),
+    )
+    with open(os.path.join(cache_dir, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(sorted(vocab, key=vocab.get), f)
+    pd.DataFrame(keys, columns=["ticker", "year"]).to_parquet(
+        os.path.join(cache_dir, "keys.parquet"), index=False
+    )
+
+    print(f"[INFO] Token cache: {len(keys)} filings, {offsets[-1]:,} tokens, "
+          f"{len(vocab):,} types -> {cache_dir}/")
+    return load_token_cache(cache_dir)
+
+
+# =============================================================================
+# LOAD / ACCESS
+# =============================================================================
+
+def load_token_cache(cache_dir=CACHE_DIR):
+    """Returns the cache as a dict; token ids are a read-only memmap."""
+    with np.load(os.path.join(cache_dir, "index.npz")) as index:
+        cache = {name: index[name] for name in index.files}
+    with open(os.path.join(cache_dir, "vocab.json"), encoding="utf-8") as f:
+        cache["vocab"] = json.load(f)
+    cache["token_ids"] = {tok: i for i, tok in enumerate(cache["vocab"])}
+    cache["keys"]      = pd.read_parquet(os.path.join(cache_dir, "keys.parquet"))
+
+    path = os.path.join(cache_dir, "tokens.bin")
+    cache["tokens"] = (
+        np.memmap(path, dtype=np.int32, mode="r") if os.path.getsize(path)
+        else np.empty(0, dtype=np.int32)
+    )
+    return cache
+
+
+def filing_tokens(cache, i):
+    return cache["tokens"][cache["offsets"][i]:cache["offsets"][i + 1]]
+
+
+def section_tokens(cache, i):
+    """Returns (item_1a_ids, item_1c_ids) for filing i; 1C is empty when absent."""
+    ids   = filing_tokens(cache, i)
+    split = cache["split_1c"][i]
+    if split < 0:
+        return ids, ids[:0]
+    return ids[:split], ids[split:]
+
+
+def sentence_starts(cache, i):
+    return cache["sent_starts"][cache["sent_offsets"][i]:cache["sent_offsets"][i + 1]]
+
+
+def paragraph_starts(cache, i):
+    return cache["para_starts"][cache["para_offsets"][i]:cache["para_offsets"][i + 1]]
+
+
+def encode(cache, phrase, partial_edges=False):
+    """
+    Encodes phrase as a list of candidate-id arrays, one per token position,
+    or None if it cannot occur in the corpus. With partial_edges=True the
+    first token also matches vocabulary entries ending with it and the last
+    token entries starting with it, mirroring plain substring search
+    ("risks from cyber" matches "risks from cybersecurity").
+    """
+    words = TOKEN_RE.findall(phrase.lower())
+    if not words:
+        return None
+    encoded = []
+    for k, word in enumerate(words):
+        if partial_edges and (k == 0 or k == len(words) - 1):
+            first, last = k == 0, k == len(words) - 1
+            ids = [
+                i for i, tok in enumerate(cache["vocab"])
+                if (tok == word
+                    or (last and not first and tok.startswith(word))
+                    or (first and not last and tok.endswith(word))
+                    or (first and last and word in tok))
+            ]
+        else:
+            ids = [cache["token_ids"][word]] if word in cache["token_ids"] else []
+        if not ids:
+            return None
+        encoded.append(np.asarray(ids, dtype=np.int32))
+    return encoded
+
+
+def count_phrase(tokens, phrase_ids):
+    """Occurrences of an encoded n-gram in a token-id array (vectorized)."""
+    if phrase_ids is None:
+        return 0
+    n = len(phrase_ids)
+    if len(tokens) < n:
+        return 0
+    span = len(tokens) - n + 1
+    hits = np.ones(span, dtype=bool)
+    for k, ids in enumerate(phrase_ids):
+        window = tokens[k:k + span]
+        hits  &= (window == ids[0]) if len(ids) == 1 else np.isin(window, ids)
+    return int(hits.sum())
+
+
+if __name__ == "__main__":
+    cache = build_token_cache()
+    print(cache["keys"].assign(n_tokens=np.diff(cache["offsets"])).to_string())
@@ -16,7 +16,8 @@ from pathlib import Path
 
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
-INPUT_FILE = os.path.join("..", "results", "nist_csf_scores.csv")
+INPUT_FILE = os.path.join("..", "results", "nist_csf_scores.parquet")
+LEGACY_CSV = os.path.join("..", "results", "nist_csf_scores.csv")
 OUTPUT_DIR = os.path.join("..", "visuals", "balance")
 THRESHOLD  = 0.6
 
@@ -46,7 +47,7 @@ plt.rcParams.update({
 Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
 
 # Load
-df = pd.read_csv(INPUT_FILE)
+df = pd.read_parquet(INPUT_FILE) if os.path.exists(INPUT_FILE) else pd.read_csv(LEGACY_CSV)
 df["size"] = df["ticker"].map(SIZE_MAP).fillna("Mid")
 print(f"Loaded {len(df)} filings")
 
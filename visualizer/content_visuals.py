@@ -22,9 +22,13 @@ import matplotlib.ticker as mticker
 import seaborn as sns
 import numpy as np
 import os
+import sys
 
-# ── PATHS ─────────────────────────────────────────────────────────────────────
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "..", "scoring"))
+from metadata import read_excel_cached
+
+# ── PATHS ─────────────────────────────────────────────────────────────────────
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "..", "visuals", "content")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
@@ -32,7 +36,7 @@ def out(filename):
     return os.path.join(OUTPUT_DIR, filename)
 
 # ── LOAD & MERGE DATA ─────────────────────────────────────────────────────────
-df = pd.read_excel(os.path.join(SCRIPT_DIR, "..", "results", "content_scores.xlsx"))
+df = read_excel_cached(os.path.join(SCRIPT_DIR, "..", "results", "content_scores.xlsx"))
 length = pd.read_csv(os.path.join(SCRIPT_DIR, "..", "results", "length_results.csv"))[["ticker","year","sector","size","has_1c"]].drop_duplicates()
 df = df.merge(length, on=["ticker","year"], how="left")
 
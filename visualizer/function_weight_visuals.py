@@ -17,7 +17,8 @@ from pathlib import Path
 
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
-INPUT_FILE = os.path.join("..", "results", "nist_csf_scores.csv")
+INPUT_FILE = os.path.join("..", "results", "nist_csf_scores.parquet")
+LEGACY_CSV = os.path.join("..", "results", "nist_csf_scores.csv")
 OUTPUT_DIR = os.path.join("..", "visuals", "function_weights")
 
 FUNCTIONS   = ["GV", "ID", "PR", "DE", "RS", "RC"]
@@ -52,7 +53,7 @@ plt.rcParams.update({
 Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
 
 # Load
-df     = pd.read_csv(INPUT_FILE)
+df     = pd.read_parquet(INPUT_FILE) if os.path.exists(INPUT_FILE) else pd.read_csv(LEGACY_CSV)
 w_cols = [f"w_{f}" for f in FUNCTIONS]
 df["size"]   = df["ticker"].map(SIZE_MAP).fillna("Mid")
 df_valid     = df[df["total_keyword_hits"] > 0].copy()